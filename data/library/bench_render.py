@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import sounds_to_page as pages
+
+def render_all(sounds_data, out_dir, mode, workers):
+    """Render every clip cold into out_dir; returns (results, seconds)"""
+    pages.STILLS_DIR = out_dir / '.stills'
+    pages.still_locks.clear()
+    start = time.perf_counter()
+    results = pages.render_videos(sounds_data, out_dir, workers, mode)
+    return results, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the encode and mux render modes on the library clips")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="parallel renders (default: 1, to compare CPU per clip)")
+    args = parser.parse_args()
+
+    if not pages.check_ffmpeg() or not pages.check_ffprobe():
+        sys.exit(1)
+    pages.ensure_cover_image()
+    with open(pages.SOUNDS_DIR / 'sounds.json', 'r', encoding='utf-8') as f:
+        sounds_data = [sound for sound in json.load(f) if (pages.SOUNDS_DIR / sound['file']).exists()]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        timings = {}
+        for mode in pages.RENDER_MODES:
+            out_dir = Path(tmp) / mode
+            results, elapsed = render_all(sounds_data, out_dir, mode, args.workers)
+            timings[mode] = elapsed
+
+            failed = [sound_file for sound_file, (status, _) in results.items() if status != 'rendered']
+            problems = {}
+            drift = []
+            for sound in sounds_data:
+                if sound['file'] in failed:
+                    continue
+                video = out_dir / 's' / Path(sound['file']).stem / 'video.mp4'
+                issues = pages.check_playback(video)
+                if issues:
+                    problems[sound['file']] = issues
+                drift.append(pages.probe_duration(video) - pages.probe_duration(pages.SOUNDS_DIR / sound['file']))
+            size = sum(path.stat().st_size for path in (out_dir / 's').glob('*/video.mp4'))
+
+            print(f"{mode}: {len(sounds_data)} clips in {elapsed:.2f}s "
+                  f"({elapsed / len(sounds_data) * 1e3:.0f} ms/clip), {size / 1024:.0f} KB of video")
+            if drift:
+                print(f"  video longer than audio by at most {max(drift):.2f}s")
+            for sound_file in failed:
+                print(f"  failed: {sound_file}")
+            for sound_file, issues in problems.items():
+                print(f"  {sound_file}: {'; '.join(issues)}")
+            if not failed and not problems:
+                print("  all videos keep the OpenGraph playback properties")
+
+        print(f"\nmux is {timings['encode'] / timings['mux']:.1f}x faster than encode")
+
+if __name__ == "__main__":
+    main()
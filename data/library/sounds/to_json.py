@@ -1,57 +1,145 @@
 import os
 import json
+import hashlib
 
-def get_sound_files():
-    # Get the directory this script is in
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # Define supported audio formats
-    audio_extensions = {'.wav', '.mp3', '.ogg', '.aac', '.flac', '.aiff', '.m4a', '.alac'}
-    
-    # List all audio files in the directory
-    files = [
-        f for f in os.listdir(current_dir) 
-        if os.path.splitext(f.lower())[1] in audio_extensions
-    ]
-    
-    # Sort the files alphabetically
-    files.sort()
-    
-    return files
-
-def get_transcript(file_name):
-    # Replace audio extension with .txt for transcript file
-    transcript_file = os.path.splitext(file_name)[0] + '.txt'
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    transcript_path = os.path.join(current_dir, transcript_file)
-    
-    if os.path.exists(transcript_path):
-        with open(transcript_path, 'r', encoding='utf-8') as f:
-            # Read the content and remove newlines
-            return ' '.join(f.read().splitlines())
-    else:
-        return "Not available"
+# Define supported audio formats
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.ogg', '.aac', '.flac', '.aiff', '.m4a', '.alac'}
 
-def main():
-    # Get the sound files
-    sound_files = get_sound_files()
-    
-    output_data = []
-
-    for sound_file in sound_files:
-        transcript_text = get_transcript(sound_file)
-        output_data.append({
+# Hex digits of the audio hash used as the ?v= cache-busting token in audio URLs
+VERSION_LENGTH = 12
+
+# Get the directory this script is in
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.path.join(CURRENT_DIR, 'sounds.json')
+# Size, mtime and hash of every file, so unchanged files are not rehashed; local only (gitignored)
+CACHE_NAME = '.sounds.cache.json'
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def scan_directory(directory=CURRENT_DIR):
+    """Stat every audio file and transcript in one os.scandir pass
+
+    Returns ({audio file: stat}, {transcript base name: (file, stat)}).
+    """
+    sounds = {}
+    transcripts = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            base_name, extension = os.path.splitext(entry.name)
+            if extension.lower() in AUDIO_EXTENSIONS:
+                sounds[entry.name] = entry.stat()
+            elif extension.lower() == '.txt':
+                transcripts[base_name] = (entry.name, entry.stat())
+    return sounds, transcripts
+
+def file_record(path, stat, previous):
+    """Size, mtime and hash of a file, reusing the previous hash when size and mtime match"""
+    if previous and previous['size'] == stat.st_size and previous['mtime'] == stat.st_mtime_ns:
+        return previous
+    return {'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'hash': file_hash(path)}
+
+def read_transcript(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        # Read the content and remove newlines
+        return ' '.join(f.read().splitlines())
+
+def read_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def load_manifest(path=MANIFEST_PATH):
+    """Previous manifest entries by file name"""
+    return {entry['file']: entry for entry in read_json(path, [])}
+
+def build_manifest(previous, cache, directory=CURRENT_DIR):
+    """Manifest entries and file cache for every sound, only hashing and reading files whose size or mtime changed
+
+    cache maps each sound file to the records of its audio and transcript
+    files from the previous run.
+    """
+    sounds, transcripts = scan_directory(directory)
+    entries = []
+    new_cache = {}
+    for sound_file in sorted(sounds):
+        old = cache.get(sound_file, {})
+        audio = file_record(os.path.join(directory, sound_file), sounds[sound_file], old.get('audio'))
+
+        transcript = None
+        transcript_text = "Not available"
+        base_name = os.path.splitext(sound_file)[0]
+        if base_name in transcripts:
+            transcript_file, stat = transcripts[base_name]
+            transcript_path = os.path.join(directory, transcript_file)
+            transcript = file_record(transcript_path, stat, old.get('transcript'))
+            # An unchanged transcript keeps its published text without being reopened
+            if transcript is old.get('transcript') and sound_file in previous:
+                transcript_text = previous[sound_file]['transcript']
+            else:
+                transcript_text = read_transcript(transcript_path)
+
+        entries.append({
             "file": sound_file,
-            "transcript": transcript_text
+            "transcript": transcript_text,
+            "version": audio['hash'][:VERSION_LENGTH],
         })
-    
-    # Get the output path
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    output_path = os.path.join(current_dir, 'sounds.json')
-    
-    # Write to JSON file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output_data, f, indent=4)
+        new_cache[sound_file] = {"audio": audio, "transcript": transcript}
+    return entries, new_cache
+
+def content_key(entry):
+    """What a clip's page and video are generated from: the audio version and a hash of the transcript"""
+    return entry['version'], hashlib.sha256(entry['transcript'].encode('utf-8')).hexdigest()[:VERSION_LENGTH]
+
+def diff_manifest(old_keys, entries):
+    """Split clips into added, changed and removed against {file: content_key} of a previous build"""
+    new_keys = {entry['file']: content_key(entry) for entry in entries}
+    added = sorted(name for name in new_keys if name not in old_keys)
+    changed = sorted(name for name in new_keys if name in old_keys and tuple(old_keys[name]) != new_keys[name])
+    removed = sorted(name for name in old_keys if name not in new_keys)
+    return {"added": added, "changed": changed, "removed": removed}
+
+def write_json(data, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=4)
+
+def update_manifest(path=MANIFEST_PATH):
+    """Rescan the folder, rewrite the manifest if anything changed and return (entries, changes)
+
+    The published manifest only changes with the clips themselves; a new
+    mtime on unchanged content only updates the local cache, so the next
+    run skips the hash.
+    """
+    directory = os.path.dirname(path)
+    cache_path = os.path.join(directory, CACHE_NAME)
+    previous = load_manifest(path)
+    cache = read_json(cache_path, {})
+    entries, new_cache = build_manifest(previous, cache, directory)
+    changes = diff_manifest({name: content_key(entry) for name, entry in previous.items() if 'version' in entry},
+                            entries)
+    if list(previous.values()) != entries or not os.path.exists(path):
+        write_json(entries, path)
+    if cache != new_cache:
+        write_json(new_cache, cache_path)
+    return entries, changes
+
+def print_changes(changes):
+    for kind in ("added", "changed", "removed"):
+        for name in changes[kind]:
+            print(f"{kind.capitalize()}: {name}")
+    print(f"{len(changes['added'])} added, {len(changes['changed'])} changed, {len(changes['removed'])} removed")
+
+def main():
+    entries, changes = update_manifest()
+    print_changes(changes)
+    print(f"{len(entries)} sounds in {os.path.basename(MANIFEST_PATH)}")
 
 if __name__ == '__main__':
     main()
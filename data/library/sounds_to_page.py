@@ -1,8 +1,79 @@
+import argparse
+import hashlib
 import json
 import os
+import math
+import shutil
 import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent  # Go up to root directory
+COVER_IMAGE = ROOT_DIR / 'img' / 'video-cover.jpg'
+SOUNDS_DIR = Path(__file__).resolve().parent / 'sounds'
+
+sys.path.insert(0, str(SOUNDS_DIR))
+import to_json
+sys.path.insert(0, str(ROOT_DIR / 'scripts' / 'audio_parser'))
+import store
+
+# Everything between the inputs and the output of the encode; part of each video's render key
+ENCODE_SETTINGS = [
+    '-c:v', 'libx264',
+    '-c:a', 'aac',
+    '-strict', 'experimental',
+    '-b:a', '192k',
+    '-shortest',
+    '-s', '250x100',
+    '-threads', '1',
+]
+# Mux mode: the still video track is encoded once per cover and duration class,
+# then each clip's audio is muxed against it with the video stream copied
+STILL_SETTINGS = [
+    '-r', '1',
+    '-c:v', 'libx264',
+    '-tune', 'stillimage',
+    '-pix_fmt', 'yuv420p',
+    '-g', '1',
+    '-s', '250x100',
+    '-threads', '1',
+]
+MUX_SETTINGS = [
+    '-map', '0:v:0',
+    '-map', '1:a:0',
+    '-c:v', 'copy',
+    '-c:a', 'aac',
+    '-b:a', '192k',
+    '-shortest',
+    '-movflags', '+faststart',
+]
+# Still tracks are made in whole seconds, so clips of similar length share one
+DURATION_CLASS = 1
+STILLS_DIR = Path(__file__).resolve().parent / '.stills'
+
+RENDER_MODES = ['encode', 'mux']
+# Stored next to each video.mp4: the render key it was made from
+RENDER_KEY_NAME = 'video.key'
+# Stored in the pages folder: the content key of every clip whose page and video are up to date
+RENDERED_NAME = 'rendered.json'
+
+# Properties OpenGraph embeds (Discord in particular) need to play the video inline
+PLAYBACK_PROPERTIES = {
+    'format': 'mp4',
+    'video_codec': 'h264',
+    'width': 250,
+    'height': 100,
+    'audio_codec': 'aac',
+}
+
+# One lock per still track, so parallel renders wait for a track instead of encoding it twice
+still_locks = {}
+still_locks_guard = threading.Lock()
+
 def format_title(filename):
     """Convert filename like 'american_seed' to 'American Seed'"""
     # Remove extension and split by underscore
@@ -23,77 +94,208 @@ def check_ffmpeg():
         print("Error: ffmpeg check failed")
         return False
 
-def create_video_for_sound(sound_file, output_dir):
-    """Create a video file from audio and static image"""
-    # First check if ffmpeg is available
-    if not check_ffmpeg():
-        return False
-        
+def check_ffprobe():
+    """Check if ffprobe is available; mux mode needs it for clip durations and playback checks"""
     try:
-        # Setup paths
-        script_dir = Path(__file__).parent.parent.parent  # Go up to root directory
-        assets_dir = script_dir / 'img'
-        cover_image = assets_dir / 'video-cover.jpg'
-        
-        print(f"Using cover image: {cover_image}")
-        print(f"Output directory: {output_dir}")
-        
-        # If video-cover.jpg doesn't exist, create it using ffmpeg
-        if not cover_image.exists():
-            print("Creating video cover image...")
-            create_cover_cmd = [
+        subprocess.run(['ffprobe', '-version'], capture_output=True, check=True)
+        return True
+    except FileNotFoundError:
+        print("Error: ffprobe not found. It ships with ffmpeg; ensure it's in your system PATH")
+        return False
+    except subprocess.CalledProcessError:
+        print("Error: ffprobe check failed")
+        return False
+
+def ensure_cover_image():
+    """Create the video cover image with ffmpeg if it doesn't exist yet"""
+    if not COVER_IMAGE.exists():
+        print("Creating video cover image...")
+        create_cover_cmd = [
+            'ffmpeg',
+            '-f', 'lavfi',
+            '-i', 'color=c=black:s=250x100',
+            '-frames:v', '1',
+            str(COVER_IMAGE)
+        ]
+        subprocess.run(create_cover_cmd, check=True, capture_output=True)
+        print("Created video cover image")
+
+def file_digest(path, digest=None):
+    digest = digest or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest
+
+def mode_settings(mode):
+    return ENCODE_SETTINGS if mode == 'encode' else STILL_SETTINGS + MUX_SETTINGS
+
+def render_key(audio_input, cover_image, mode='encode'):
+    """Hash of everything a video depends on: the audio, the cover and the encode settings"""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(mode_settings(mode)).encode())
+    for path in (audio_input, cover_image):
+        file_digest(path, digest)
+    return digest.hexdigest()
+
+def probe_duration(path):
+    """Length of a media file in seconds, read with ffprobe"""
+    result = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration',
+                             '-of', 'default=noprint_wrappers=1:nokey=1', str(path)],
+                            check=True, capture_output=True, text=True)
+    return float(result.stdout.strip())
+
+def still_track(duration):
+    """Path of a still video track of the cover at least duration seconds long, encoding it if needed"""
+    seconds = max(DURATION_CLASS, math.ceil(duration / DURATION_CLASS) * DURATION_CLASS)
+    digest = file_digest(COVER_IMAGE)
+    digest.update(json.dumps(STILL_SETTINGS).encode())
+    still = STILLS_DIR / f"{digest.hexdigest()[:16]}-{seconds}s.mp4"
+    
+    with still_locks_guard:
+        lock = still_locks.setdefault(still, threading.Lock())
+    with lock:
+        if not still.exists():
+            STILLS_DIR.mkdir(parents=True, exist_ok=True)
+            partial = still.with_name(still.stem + '.partial.mp4')
+            cmd = [
                 'ffmpeg',
-                '-f', 'lavfi',
-                '-i', 'color=c=black:s=250x100',
-                '-frames:v', '1',
-                str(cover_image)
+                '-y',
+                '-loop', '1',
+                '-framerate', '1',
+                '-i', str(COVER_IMAGE),
+                '-t', str(seconds),
+                *STILL_SETTINGS,
+                str(partial)
             ]
-            subprocess.run(create_cover_cmd, check=True, capture_output=True)
-            print("Created video cover image")
-        
-        video_output = output_dir / 'video.mp4'
-        audio_input = Path(__file__).parent / 'sounds' / sound_file
-        
-        print(f"Audio input: {audio_input}")
-        
-        # Verify audio file exists
-        if not audio_input.exists():
-            print(f"Audio file not found: {audio_input}")
-            return False
-            
-        # FFmpeg command to create video
-        cmd = [
+            subprocess.run(cmd, check=True, capture_output=True, text=True)
+            os.replace(partial, still)
+    return still
+
+def render_command(audio_input, output, mode):
+    """ffmpeg command that renders one clip's video in the given mode"""
+    if mode == 'mux':
+        # The video track is ready-made; only the audio is encoded
+        return [
             'ffmpeg',
-            '-y',  # Overwrite output file if it exists
-            '-loop', '1',
-            '-i', str(cover_image),
+            '-y',
+            '-i', str(still_track(probe_duration(audio_input))),
             '-i', str(audio_input),
-            '-c:v', 'libx264',
-            '-c:a', 'aac',
-            '-strict', 'experimental',
-            '-b:a', '192k',
-            '-shortest',
-            '-s', '250x100',
-            str(video_output)
+            *MUX_SETTINGS,
+            str(output)
         ]
-        
-        print(f"Running command: {' '.join(cmd)}")
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        print(f"Created video for {sound_file}")
-        return True
-        
+    return [
+        'ffmpeg',
+        '-y',  # Overwrite output file if it exists
+        '-loop', '1',
+        '-i', str(COVER_IMAGE),
+        '-i', str(audio_input),
+        *ENCODE_SETTINGS,
+        str(output)
+    ]
+
+def check_playback(video):
+    """Return the ways video differs from PLAYBACK_PROPERTIES, as a list of messages"""
+    result = subprocess.run(['ffprobe', '-v', 'error', '-show_entries',
+                             'format=format_name:stream=codec_type,codec_name,width,height,pix_fmt',
+                             '-of', 'json', str(video)], check=True, capture_output=True, text=True)
+    info = json.loads(result.stdout)
+    streams = {stream['codec_type']: stream for stream in info['streams']}
+    video_stream, audio_stream = streams.get('video', {}), streams.get('audio', {})
+    actual = {
+        'format': 'mp4' if 'mp4' in info['format']['format_name'].split(',') else info['format']['format_name'],
+        'video_codec': video_stream.get('codec_name'),
+        'width': video_stream.get('width'),
+        'height': video_stream.get('height'),
+        'audio_codec': audio_stream.get('codec_name'),
+    }
+    problems = [f"{name} is {actual[name]}, expected {expected}"
+                for name, expected in PLAYBACK_PROPERTIES.items() if actual[name] != expected]
+    # 4:2:0 is the only chroma layout browsers decode everywhere; yuvj420p is its full-range twin
+    if video_stream.get('pix_fmt') not in ('yuv420p', 'yuvj420p'):
+        problems.append(f"pix_fmt is {video_stream.get('pix_fmt')}, expected yuv420p")
+    return problems
+
+def create_video_for_sound(sound_file, output_dir, mode='encode'):
+    """Create a video file from audio and static image, unless an up-to-date one exists
+
+    Returns 'rendered', 'cached' or 'failed'.
+    """
+    video_output = output_dir / 'video.mp4'
+    key_file = output_dir / RENDER_KEY_NAME
+    audio_input = SOUNDS_DIR / sound_file
+    
+    # Verify audio file exists
+    if not audio_input.exists():
+        print(f"Audio file not found: {audio_input}")
+        return 'failed'
+    
+    key = render_key(audio_input, COVER_IMAGE, mode)
+    if video_output.exists() and key_file.exists() and key_file.read_text().strip() == key:
+        return 'cached'
+    
+    # Render to a temporary file so a failed encode never replaces a good video
+    partial_output = output_dir / 'video.partial.mp4'
+    
+    try:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        cmd = render_command(audio_input, partial_output, mode)
+        subprocess.run(cmd, check=True, capture_output=True, text=True)
+        # A copied still track keeps whatever it was encoded with, so check the result before publishing it
+        problems = check_playback(partial_output) if mode == 'mux' else []
+        if not problems:
+            os.replace(partial_output, video_output)
+            key_file.write_text(key + '\n')
+            return 'rendered'
+        print(f"Video for {sound_file} would not play inline: {'; '.join(problems)}")
     except subprocess.CalledProcessError as e:
         print(f"FFmpeg error for {sound_file}: {e.stderr}")
-        return False
     except Exception as e:
         print(f"Unexpected error creating video for {sound_file}: {e}")
-        print(f"Current working directory: {os.getcwd()}")
-        return False
+    partial_output.unlink(missing_ok=True)
+    return 'failed'
+
+def timed_render(sound_file, output_dir, mode='encode'):
+    start = time.perf_counter()
+    status = create_video_for_sound(sound_file, output_dir, mode)
+    return status, time.perf_counter() - start
 
-def create_sound_page(sound_data, template_dir):
-    """Create an individual HTML page for a sound file"""
+def render_videos(sounds_data, template_dir, workers, mode='encode'):
+    """Render every sound's video in a bounded pool; returns {file: (status, seconds)}
+
+    ffmpeg does the work in its own processes, so threads are enough to
+    keep the pool busy. Each encode is limited to one thread so the pool
+    size decides how many cores are used.
+    """
+    jobs = {sound['file']: Path(template_dir) / 's' / os.path.splitext(sound['file'])[0]
+            for sound in sounds_data}
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {sound_file: pool.submit(timed_render, sound_file, output_dir, mode)
+                   for sound_file, output_dir in jobs.items()}
+        return {sound_file: future.result() for sound_file, future in futures.items()}
+
+def print_render_summary(results, elapsed):
+    """Print per-clip render times, slowest first, and the totals"""
+    print("\nVideo renders:")
+    for sound_file, (status, seconds) in sorted(results.items(), key=lambda item: -item[1][1]):
+        print(f"  {seconds:7.2f}s  {status:<8}  {sound_file}")
+    counts = Counter(status for status, _ in results.values())
+    print(f"Rendered {counts['rendered']}, cached {counts['cached']}, failed {counts['failed']} "
+          f"in {elapsed:.2f}s")
+
+def create_sound_page(sound_data, template_dir, video_created, audio_store=None):
+    """Create an individual HTML page for a sound file
+    
+    With the audio store manifest, the page plays the stored copy of the
+    clip, like the library page does.
+    """
     file_name = sound_data['file']
     base_name = os.path.splitext(file_name)[0]
+    audio_url = (audio_store and store.resolve(audio_store, f"library/sounds/{file_name}")) \
+        or f"/data/library/sounds/{file_name}"
+    # Cache-busting token, so browsers and embeds refetch a clip only when its audio changes
+    if sound_data.get('version'):
+        audio_url += f"?v={sound_data['version']}"
     transcript = sound_data.get('transcript', 'No transcript available')
     
     # Get formatted title
@@ -103,9 +305,6 @@ def create_sound_page(sound_data, template_dir):
     sound_dir = Path(template_dir) / 's' / base_name
     sound_dir.mkdir(parents=True, exist_ok=True)
     
-    # Create video file
-    video_created = create_video_for_sound(file_name, sound_dir)
-    
     # Add video meta tags if video was created successfully
     video_meta_tags = ''
     if video_created:
@@ -156,7 +355,7 @@ def create_sound_page(sound_data, template_dir):
         <meta property="og:image" content="https://bz2vsr.com/img/opengraph-library.png" />
         <meta property="og:title" content="{page_title}" />
         <meta property="og:description" content="{transcript}" />
-        <meta property="og:audio" content="https://bz2vsr.com/data/library/sounds/{file_name}" />
+        <meta property="og:audio" content="https://bz2vsr.com{audio_url}" />
         <meta property="og:audio:type" content="audio/{file_name.split('.')[-1]}" />
         {video_meta_tags}
     </head>
@@ -186,7 +385,7 @@ def create_sound_page(sound_data, template_dir):
                         </div>
                         <div class="card-body p-3 d-flex align-items-center">
                             <audio class="w-100" controls>
-                                <source src="/data/library/sounds/{file_name}" type="audio/{file_name.split('.')[-1]}">
+                                <source src="{audio_url}" type="audio/{file_name.split('.')[-1]}">
                                 Your browser does not support the audio element.
                             </audio>
                         </div>
@@ -220,18 +419,64 @@ def create_sound_page(sound_data, template_dir):
     with open(sound_dir / 'index.html', 'w', encoding='utf-8') as f:
         f.write(html_content)
 
+def load_rendered(template_dir):
+    """{file: content key} of the clips whose pages and videos are up to date"""
+    path = Path(template_dir) / 's' / RENDERED_NAME
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def write_rendered(template_dir, rendered):
+    path = Path(template_dir) / 's' / RENDERED_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(rendered.items())), f, indent=4)
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate a page and an OpenGraph video for every library sound")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="parallel video encodes (default: one per core)")
+    parser.add_argument('--mode', choices=RENDER_MODES, default='encode',
+                        help="encode: encode every video in full; mux: encode the still cover track once "
+                             "per duration and only encode each clip's audio (default: encode)")
+    parser.add_argument('--all', action='store_true', help="regenerate every page, not just changed clips")
+    args = parser.parse_args()
+    
     # Get the directory where this script is located
     script_dir = Path(__file__).parent.resolve()
     
-    # Read the sounds.json file
-    with open(script_dir / 'sounds' / 'sounds.json', 'r', encoding='utf-8') as f:
-        sounds_data = json.load(f)
+    # Bring sounds.json up to date, then work out which clips changed since the pages were last built
+    sounds_data, _ = to_json.update_manifest()
+    rendered = {} if args.all else load_rendered(script_dir)
+    changes = to_json.diff_manifest(rendered, sounds_data)
+    to_json.print_changes(changes)
+    pending = set(changes['added']) | set(changes['changed'])
+    pending_data = [sound for sound in sounds_data if sound['file'] in pending]
+    
+    # Remove pages of clips that are gone
+    for sound_file in changes['removed']:
+        shutil.rmtree(script_dir / 's' / os.path.splitext(sound_file)[0], ignore_errors=True)
+        rendered.pop(sound_file, None)
+    
+    # Render videos first, checking for ffmpeg (and ffprobe, which mux needs) only once
+    results = {}
+    if pending_data and check_ffmpeg() and (args.mode != 'mux' or check_ffprobe()):
+        ensure_cover_image()
+        start = time.perf_counter()
+        results = render_videos(pending_data, script_dir, args.workers, args.mode)
+        print_render_summary(results, time.perf_counter() - start)
     
-    # Create pages for each sound
-    for sound in sounds_data:
-        create_sound_page(sound, script_dir)
+    # Create pages for each new or changed sound
+    audio_store = store.load_manifest()
+    for sound in pending_data:
+        status, _ = results.get(sound['file'], ('failed', 0))
+        create_sound_page(sound, script_dir, status != 'failed', audio_store)
+        # A page without its video is retried on the next run
+        if status != 'failed':
+            rendered[sound['file']] = to_json.content_key(sound)
         print(f"Created page for {sound['file']}")
+    write_rendered(script_dir, rendered)
 
 if __name__ == "__main__":
     main()
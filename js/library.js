@@ -2,7 +2,7 @@
 let currentlyPlaying = null;
 
 // Function to create an audio player card
-function createAudioCard(soundData) {
+function createAudioCard(soundData, audioStore, audioPeaks) {
     const column = document.createElement('div');
     column.className = 'col-12 col-md-4 mb-3';
     
@@ -10,6 +10,19 @@ function createAudioCard(soundData) {
     const baseName = soundData.file.split('.')[0];
     const shareUrl = `${window.location.origin}/library/s/${baseName}`;
     
+    // Play the stored copy the audio store manifest points to, if there is one
+    const blob = audioStore && audioStore.names[`library/sounds/${soundData.file.toLowerCase()}`];
+    const storedUrl = blob ? audioStore.blobs[blob] : `/data/library/sounds/${soundData.file}`;
+    // The manifest's version token changes with the audio, so browsers can cache clips indefinitely
+    const audioUrl = soundData.version ? `${storedUrl}?v=${soundData.version}` : storedUrl;
+    
+    // Duration and waveform come precomputed, so nothing is downloaded until the clip is played
+    const clip = blob && audioPeaks && audioPeaks.clips[blob];
+    const durationBadge = clip
+        ? `<small class="text-muted ms-2">${formatDuration(clip.duration)}</small>`
+        : '';
+    const waveform = clip ? createWaveform(clip.peaks) : '';
+    
     const card = document.createElement('div');
     card.className = 'card';
     
@@ -36,6 +49,7 @@ function createAudioCard(soundData) {
         <div class="card-header bg-secondary-subtle d-flex justify-content-between align-items-center">
             <div class="d-flex align-items-center">
                 <h6 class="mb-0">${soundData.file}</h6>
+                ${durationBadge}
                 <button class="btn btn-link btn-sm p-0 ms-2 position-relative" onclick="copyShareLink(this, '${shareUrl}')" title="Copy link">
                     <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" fill="currentColor" class="bi bi-copy" viewBox="0 0 16 16">
                         <path fill-rule="evenodd" d="M4 2a2 2 0 0 1 2-2h8a2 2 0 0 1 2 2v8a2 2 0 0 1-2 2H6a2 2 0 0 1-2-2zm2-1a1 1 0 0 0-1 1v8a1 1 0 0 0 1 1h8a1 1 0 0 0 1-1V2a1 1 0 0 0-1-1zM2 5a1 1 0 0 0-1 1v8a1 1 0 0 0 1 1h8a1 1 0 0 0 1-1v-1h1v1a2 2 0 0 1-2 2H2a2 2 0 0 1-2-2V6a2 2 0 0 1 2-2h1v1z"/>
@@ -52,9 +66,10 @@ function createAudioCard(soundData) {
                 <path d="M10.025 8a4.5 4.5 0 0 1-1.318 3.182L8 10.475A3.5 3.5 0 0 0 9.025 8c0-.966-.392-1.841-1.025-2.475l.707-.707A4.5 4.5 0 0 1 10.025 8M7 4a.5.5 0 0 0-.812-.39L3.825 5.5H1.5A.5.5 0 0 0 1 6v4a.5.5 0 0 0 .5.5h2.325l2.363 1.89A.5.5 0 0 0 7 12zM4.312 6.39 6 5.04v5.92L4.312 9.61A.5.5 0 0 0 4 9.5H2v-3h2a.5.5 0 0 0 .312-.11"/>
             </svg>
         </div>
+        ${waveform}
         <div class="card-body p-3 d-flex align-items-center">
             <audio class="w-100" controls>
-                <source src="/data/library/sounds/${soundData.file}" type="audio/${soundData.file.split('.').pop()}">
+                <source src="${audioUrl}" type="audio/${soundData.file.split('.').pop()}">
                 Your browser does not support the audio element.
             </audio>
         </div>
@@ -150,6 +165,22 @@ function resetSearch() {
     });
 }
 
+// Function to format a duration in seconds as m:ss
+function formatDuration(seconds) {
+    const whole = Math.round(seconds);
+    return `${Math.floor(whole / 60)}:${String(whole % 60).padStart(2, '0')}`;
+}
+
+// Function to draw waveform peaks (percent of full scale) as an SVG bar graph
+function createWaveform(peaks) {
+    const bars = peaks.map((peak, i) => {
+        const height = Math.max(peak, 1) / 100 * 30;
+        return `<rect x="${i}" y="${(30 - height) / 2}" width="0.6" height="${height}"/>`;
+    }).join('');
+    return `<svg class="w-100 px-3 pt-2 text-primary" viewBox="0 0 ${peaks.length} 30" preserveAspectRatio="none"
+                 height="30" fill="currentColor" opacity="0.6">${bars}</svg>`;
+}
+
 // Function to load and display sounds
 async function loadSounds() {
     try {
@@ -157,6 +188,10 @@ async function loadSounds() {
         if (!response.ok) throw new Error('Failed to load sounds data');
         
         const soundFiles = await response.json();
+        const [audioStore, audioPeaks] = await Promise.all(
+            ['/data/audio-store.json', '/data/audio-peaks.json'].map(url => fetch(url)
+                .then(sidecarResponse => sidecarResponse.ok ? sidecarResponse.json() : null)
+                .catch(() => null)));
         const container = document.getElementById('LibrarySounds');
         
         // Add search bar
@@ -175,7 +210,7 @@ async function loadSounds() {
         container.appendChild(row);
         
         soundFiles.forEach(soundData => {
-            const audioCard = createAudioCard(soundData);
+            const audioCard = createAudioCard(soundData, audioStore, audioPeaks);
             row.appendChild(audioCard);
         });
     } catch (error) {
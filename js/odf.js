@@ -43,6 +43,7 @@ class ODFBrowser {
         this.searchTerm = '';
         this.selectedODF = null;
         this.currentAudio = null;
+        this.audioStore = null;
         
         this.sidebar = document.getElementById('odfSidebarContent');
         this.content = document.getElementById('odfContentContent');
@@ -1034,7 +1035,7 @@ class ODFBrowser {
                     <div class="d-flex align-items-center gap-2">
                         <code style="color: rgba(255, 165, 0, 0.85)">${value}</code>
                         <button class="btn btn-sm btn-outline-secondary d-flex align-items-center p-1 rounded-circle" 
-                                onclick="browser.playAudio('../data/audio/${value}', this)">
+                                onclick="browser.playSound('${value}', this)">
                             <svg xmlns="http://www.w3.org/2000/svg" width="14" height="14" fill="currentColor" class="bi bi-play-fill" viewBox="0 0 16 16">
                                 <path d="m11.596 8.697-6.363 3.692c-.54.313-1.233-.066-1.233-.697V4.308c0-.63.692-1.01 1.233-.696l6.363 3.692a.802.802 0 0 1 0 1.393z"/>
                             </svg>
@@ -1191,6 +1192,23 @@ class ODFBrowser {
         this.displayODFData(category, filename);
     }
 
+    async resolveAudio(name) {
+        // Names resolve through the audio store manifest, so duplicate sounds share one file
+        // and a reference matches the file whatever its letter case
+        if (!this.audioStore) {
+            this.audioStore = fetch('/data/audio-store.json')
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null);
+        }
+        const store = await this.audioStore;
+        const blob = store && store.names[`audio/${name.toLowerCase()}`];
+        return blob ? store.blobs[blob] : `/data/audio/${name}`;
+    }
+
+    async playSound(name, buttonElement) {
+        this.playAudio(await this.resolveAudio(name), buttonElement);
+    }
+
     playAudio(url, buttonElement) {
         const audio = new Audio(url);
         const errorSpan = buttonElement.nextElementSibling;
@@ -1,16 +1,27 @@
+import argparse
+import hashlib
 import json
 import os
 import shutil
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, where only hardlinks and copies are used
+    fcntl = None
+
 # Get paths
 SCRIPT_DIR = Path(__file__).parent
 SRC_DIR = SCRIPT_DIR / 'src'
 OUTPUT_DIR = SCRIPT_DIR / 'output'
 JSON_PATH = SCRIPT_DIR / 'Categorized-ODF-Data.json'
+ASSETS_PATH = SCRIPT_DIR / 'odf.assets.min.json'
 
-# Create output directory if it doesn't exist
-OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+# Linux ioctl that clones a file's extents (cp --reflink)
+FICLONE = 0x40049409
 
 def find_wav_references(obj):
     """Recursively search through object for .wav file references"""
@@ -31,49 +42,172 @@ def find_wav_references(obj):
             
     return wav_files
 
-def check_wav_file(filename):
-    """Search for WAV file in src and output directories"""
-    # First check if file already exists in output
-    dst_file = OUTPUT_DIR / filename
-    if dst_file.exists():
-        return True
-        
-    # If not in output, check src directory
-    src_wavs = {f.name.lower(): f for f in SRC_DIR.glob('**/*.wav')}
-    wav_lower = filename.lower()
-    
-    if wav_lower in src_wavs:
-        src_file = src_wavs[wav_lower]
-        shutil.copy2(src_file, dst_file)
-        return True
+def load_wav_references():
+    """Return every referenced WAV file name, from the asset index when it is available"""
+    if ASSETS_PATH.exists():
+        with open(ASSETS_PATH, 'r', encoding='utf-8') as f:
+            assets = json.load(f)['assets']
+        return {spelling for entry in assets.values() if entry['type'] == 'sound'
+                for spelling in entry['spellings'] if spelling.lower().endswith('.wav')}
     
-    print(f'Not found: {filename}')
-    return False
-
-def main():
-    # Load the JSON data
+    # Fall back to scanning the categorized data
     with open(JSON_PATH, 'r', encoding='utf-8') as f:
         data = json.load(f)
     
-    # Find all WAV references
     wav_references = set()
     for category in data.values():
         for odf in category.values():
             wav_references.update(find_wav_references(odf))
+    return wav_references
+
+def index_sources(src_dir):
+    """Map lowercase WAV names to their files with a single walk of src_dir (first match wins)"""
+    index = {}
+    # Match the extension case-insensitively; game files are often named in upper case
+    for path in sorted(src_dir.glob('**/*')):
+        if path.suffix.lower() == '.wav' and path.is_file():
+            index.setdefault(path.name.lower(), path)
+    return index
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def is_current(src_file, dst_file):
+    """Check whether dst_file already holds src_file, hashing only when size matches but mtime does not"""
+    if not dst_file.exists():
+        return False
+    src_stat, dst_stat = src_file.stat(), dst_file.stat()
+    if src_stat.st_size != dst_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dst_stat.st_mtime_ns:
+        return True
+    if file_hash(src_file) != file_hash(dst_file):
+        return False
+    # Same content: take the source mtime so the next run skips the hash
+    os.utime(dst_file, ns=(dst_stat.st_atime_ns, src_stat.st_mtime_ns))
+    return True
+
+def reflink(src_file, dst_file):
+    """Clone src_file into dst_file on filesystems with copy-on-write support (Btrfs, XFS)"""
+    if fcntl is None:
+        return False
+    with open(src_file, 'rb') as src, open(dst_file, 'wb') as dst:
+        try:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            failed = True
+        else:
+            failed = False
+    if failed:
+        dst_file.unlink()
+        return False
+    shutil.copystat(src_file, dst_file)
+    return True
+
+def place_file(src_file, dst_file, links=True):
+    """Put src_file at dst_file as a reflink, a hardlink or a copy, in that order of preference"""
+    tmp_file = dst_file.with_name(dst_file.name + '.tmp')
+    tmp_file.unlink(missing_ok=True)
+    method = 'copied'
+    if links and reflink(src_file, tmp_file):
+        method = 'reflinked'
+    else:
+        try:
+            if not links:
+                raise OSError
+            os.link(src_file, tmp_file)
+            method = 'hardlinked'
+        except OSError:
+            shutil.copy2(src_file, tmp_file)
+    # Replace in one step so an interrupted sync never leaves a partial file
+    os.replace(tmp_file, dst_file)
+    return method
+
+def sync_file(filename, sources, links=True):
+    """Bring one referenced WAV up to date in the output folder; returns what was done"""
+    src_file = sources.get(filename.lower())
+    if src_file is None:
+        return 'missing'
+    dst_file = OUTPUT_DIR / filename
+    if is_current(src_file, dst_file):
+        return 'up to date'
+    return place_file(src_file, dst_file, links)
+
+def output_wavs():
+    """WAV files in the output folder, whatever the case of their extension"""
+    return [path for path in OUTPUT_DIR.iterdir() if path.suffix.lower() == '.wav' and path.is_file()]
+
+def output_names(wav_references, sources):
+    """Pick one output file name per referenced sound, keyed by lowercase name
     
-    # Check and copy WAV files if needed
-    found_count = 0
-    missing_count = 0
-    
+    The game matches names case-insensitively, so ORDIN_A.wav and
+    Ordin_a.wav are one sound and get one file. An existing output keeps
+    its spelling; otherwise the source file's is used.
+    """
+    existing = {path.name.lower(): path.name for path in output_wavs()}
+    names = {}
     for wav in sorted(wav_references):
-        if check_wav_file(wav):
-            found_count += 1
-        else:
-            missing_count += 1
+        key = wav.lower()
+        if key not in names:
+            source = sources.get(key)
+            names[key] = existing.get(key) or (source.name if source else wav)
+    return names
+
+def prune_outputs(names):
+    """Remove WAV files from the output folder that are no longer referenced (compared case-insensitively)"""
+    removed = []
+    for path in output_wavs():
+        if path.name.lower() not in names:
+            path.unlink()
+            removed.append(path.name)
+    return sorted(removed)
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy the WAV files the ODF data references from src to output")
+    parser.add_argument('--workers', type=int, default=8, help="parallel copies (default: 8)")
+    parser.add_argument('--no-links', action='store_true',
+                        help="always make full copies instead of reflinks or hardlinks")
+    parser.add_argument('--keep-stale', action='store_true',
+                        help="keep output files that are no longer referenced")
+    args = parser.parse_args()
+    
+    # Create output directory if it doesn't exist
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    
+    # Find all WAV references
+    wav_references = load_wav_references()
+    
+    # Walk the source tree once
+    sources = index_sources(SRC_DIR)
+    
+    # One file per sound, so case variants never race on the same file where names are case-insensitive
+    names = output_names(wav_references, sources)
+    wavs = sorted(names.values())
+    
+    # Bring every referenced WAV up to date in parallel; the work is I/O bound
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        results = dict(zip(wavs, pool.map(lambda wav: sync_file(wav, sources, not args.no_links), wavs)))
+    
+    for wav, result in results.items():
+        if result == 'missing':
+            print(f'Not found: {wav}')
+    
+    pruned = [] if args.keep_stale else prune_outputs(names)
+    for wav in pruned:
+        print(f'Removed: {wav}')
     
-    print(f'\nProcessed {len(wav_references)} WAV references:')
-    print(f'Found: {found_count}')
-    print(f'Missing: {missing_count}')
+    counts = Counter(results.values())
+    print(f'\nProcessed {len(wav_references)} WAV references ({len(wavs)} sounds) from {len(sources)} source files:')
+    print(f"Found: {len(wavs) - counts['missing']}")
+    for result in ('up to date', 'reflinked', 'hardlinked', 'copied'):
+        if counts[result]:
+            print(f'  - {result}: {counts[result]}')
+    print(f"Missing: {counts['missing']}")
+    print(f'Pruned: {len(pruned)}')
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,167 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+except ImportError:
+    sys.exit("peaks.py needs numpy (pip install numpy)")
+
+# Optional: libsndfile decodes mp3 and ogg in-process; without it they go through ffmpeg
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+from store import DATA_DIR, REPO_DIR, load_manifest
+
+PEAKS_PATH = DATA_DIR / 'audio-peaks.json'
+
+FORMAT = 'audio-peaks-1'
+
+# Waveform buckets per clip, each the loudest sample in its slice as a percentage of full scale
+PEAKS = 100
+# Floor for the dBFS figures, so digital silence does not come out as -inf
+SILENCE_DB = -96.0
+
+def read_wav(path):
+    """Decode a PCM WAV into float32 samples in [-1, 1], shape (frames, channels)"""
+    with wave.open(str(path), 'rb') as f:
+        channels, width, rate = f.getnchannels(), f.getsampwidth(), f.getframerate()
+        raw = f.readframes(f.getnframes())
+    if width == 1:
+        # 8-bit WAV samples are unsigned
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif width in (2, 4):
+        dtype = np.int16 if width == 2 else np.int32
+        samples = np.frombuffer(raw, dtype=dtype).astype(np.float32) / -float(np.iinfo(dtype).min)
+    elif width == 3:
+        # 24-bit: place each sample in the top three bytes of an int32
+        triples = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(triples), 4), dtype=np.uint8)
+        padded[:, 1:] = triples
+        samples = padded.view('<i4').ravel().astype(np.float32) / 2 ** 31
+    else:
+        raise ValueError(f'unsupported sample width {width}')
+    return samples.reshape(-1, channels), rate
+
+def read_soundfile(path):
+    """Decode anything libsndfile reads (mp3, ogg, flac, ...) into float32 samples, shape (frames, channels)"""
+    samples, rate = soundfile.read(str(path), dtype='float32', always_2d=True)
+    return samples, rate
+
+def read_compressed(path):
+    """Decode a non-WAV clip with soundfile, falling back to ffmpeg for formats libsndfile lacks (aac, m4a)"""
+    if soundfile is not None:
+        try:
+            return read_soundfile(path)
+        except RuntimeError:
+            if not shutil.which('ffmpeg'):
+                raise
+    return read_ffmpeg(path)
+
+def read_ffmpeg(path):
+    """Decode anything ffmpeg reads (mp3, ogg, ...) into float32 samples, shape (frames, channels)"""
+    probe = subprocess.run(['ffprobe', '-v', 'error', '-select_streams', 'a:0', '-show_entries',
+                            'stream=sample_rate,channels', '-of', 'json', str(path)],
+                           capture_output=True, check=True, text=True)
+    stream = json.loads(probe.stdout)['streams'][0]
+    channels, rate = int(stream['channels']), int(stream['sample_rate'])
+    decoded = subprocess.run(['ffmpeg', '-v', 'error', '-i', str(path), '-f', 'f32le', '-acodec', 'pcm_f32le',
+                              'pipe:1'], capture_output=True, check=True)
+    return np.frombuffer(decoded.stdout, dtype='<f4').reshape(-1, channels), rate
+
+def to_db(value):
+    return round(max(20 * float(np.log10(value)), SILENCE_DB) if value > 0 else SILENCE_DB, 1)
+
+def analyze(path):
+    """Duration, format, loudness and waveform peaks of one clip"""
+    samples, rate = read_wav(path) if path.suffix.lower() == '.wav' else read_compressed(path)
+    frames, channels = samples.shape
+
+    # Fold channels into one envelope, then take the maximum of each of PEAKS equal slices
+    envelope = np.abs(samples).max(axis=1) if frames else np.zeros(PEAKS, dtype=np.float32)
+    slice_length = -(-len(envelope) // PEAKS)
+    padded = np.zeros(slice_length * PEAKS, dtype=np.float32)
+    padded[:len(envelope)] = envelope
+    peaks = np.minimum(np.round(padded.reshape(PEAKS, slice_length).max(axis=1) * 100), 100)
+
+    return {
+        'duration': round(frames / rate, 3),
+        'sampleRate': rate,
+        'channels': channels,
+        'rms': to_db(np.sqrt(np.mean(np.square(samples, dtype=np.float64)))) if frames else SILENCE_DB,
+        'peak': to_db(envelope.max()) if frames else SILENCE_DB,
+        'peaks': peaks.astype(int).tolist(),
+    }
+
+def analyze_blob(item):
+    """Pool worker: (blob, url) -> (blob, result or None, error)"""
+    blob, url = item
+    try:
+        return blob, analyze(REPO_DIR / url.lstrip('/')), None
+    except (OSError, EOFError, ValueError, RuntimeError, wave.Error, subprocess.CalledProcessError) as e:
+        return blob, None, str(e) or type(e).__name__
+
+def load_peaks(path=PEAKS_PATH):
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != FORMAT or data.get('peaks') != PEAKS:
+        return {}
+    return data['clips']
+
+def write_peaks(clips, path=PEAKS_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'format': FORMAT, 'peaks': PEAKS, 'clips': dict(sorted(clips.items()))},
+                  f, separators=(',', ':'))
+
+def main():
+    parser = argparse.ArgumentParser(description="Decode every clip in the audio store once and write durations, "
+                                                 "loudness and waveform peaks for the site")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="decoding processes (default: one per core)")
+    parser.add_argument('--force', action='store_true', help="re-analyze clips that already have results")
+    args = parser.parse_args()
+
+    manifest = load_manifest()
+    if manifest is None:
+        sys.exit("No audio store manifest; run store.py first")
+
+    # Results are keyed by blob id, so a clip is decoded once however many names it has,
+    # and only new content needs decoding on later runs
+    previous = {} if args.force else load_peaks()
+    clips = {blob: previous[blob] for blob in manifest['blobs'] if blob in previous}
+    pending = [(blob, url) for blob, url in manifest['blobs'].items() if blob not in clips]
+    if any(not url.lower().endswith('.wav') for _, url in pending) and soundfile is None \
+            and not shutil.which('ffmpeg'):
+        print("Warning: neither soundfile nor ffmpeg found; only WAV files can be analyzed (pip install soundfile)")
+
+    start = time.perf_counter()
+    failed = {}
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for blob, result, error in pool.map(analyze_blob, pending, chunksize=16):
+            if result is None:
+                failed[manifest['blobs'][blob]] = error
+            else:
+                clips[blob] = result
+    elapsed = time.perf_counter() - start
+
+    write_peaks(clips)
+
+    for url, error in sorted(failed.items()):
+        print(f'Failed: {url}: {error}')
+    print(f'\nAnalyzed {len(pending) - len(failed)} clips in {elapsed:.2f}s with {args.workers} workers '
+          f'({len(clips) - len(pending) + len(failed)} unchanged, {len(failed)} failed)')
+    print(f'Total duration: {sum(clip["duration"] for clip in clips.values()) / 60:.1f} min')
+    print(f'Peaks: {PEAKS_PATH.relative_to(REPO_DIR)}')
+
+if __name__ == '__main__':
+    main()
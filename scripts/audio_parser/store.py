@@ -0,0 +1,119 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from filter import file_hash
+
+# Get paths
+REPO_DIR = Path(__file__).resolve().parents[2]
+DATA_DIR = REPO_DIR / 'data'
+MANIFEST_PATH = DATA_DIR / 'audio-store.json'
+
+FORMAT = 'audio-store-1'
+
+# Folders whose audio shares the store, in order of preference for the copy that is kept
+ROOTS = [DATA_DIR / 'audio', DATA_DIR / 'library' / 'sounds']
+AUDIO_EXTENSIONS = {'.wav', '.mp3', '.ogg', '.aac', '.flac', '.aiff', '.m4a', '.alac'}
+
+# Hex digits of the sha256 used as a blob id; plenty to keep a few thousand clips apart
+BLOB_ID_LENGTH = 16
+
+def store_name(path):
+    """Manifest key of a file: its path under data/, lowercased so any spelling resolves"""
+    return path.relative_to(DATA_DIR).as_posix().lower()
+
+def store_url(path):
+    return '/' + path.relative_to(REPO_DIR).as_posix()
+
+def scan_audio():
+    """List every audio file under the store roots, in preference order"""
+    files = []
+    for root in ROOTS:
+        files.extend(sorted(path for path in root.iterdir()
+                            if path.suffix.lower() in AUDIO_EXTENSIONS and path.is_file()))
+    return files
+
+def load_manifest(path=MANIFEST_PATH):
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT:
+        raise ValueError(f'Unsupported audio store format: {manifest.get("format")}')
+    return manifest
+
+def build_manifest(files):
+    """Hash files and map every name to one blob per distinct content
+
+    The first file with a given content is the blob; later ones are
+    aliases. Duplicates stay on disk, so a plain /data/audio/<name> URL
+    still works for anything that does not read the manifest; the site
+    just downloads and caches one copy per content.
+
+    Names are lowercased, so files whose names differ only in case share
+    one entry. That is fine when their content matches; otherwise they are
+    returned as collisions, (name, [paths]), for the caller to report.
+    """
+    blobs = {}
+    names = {}
+    spellings = {}
+    duplicates = []
+    for path in files:
+        blob = file_hash(path)[:BLOB_ID_LENGTH]
+        if blob in blobs:
+            duplicates.append(path)
+        else:
+            blobs[blob] = store_url(path)
+        name = store_name(path)
+        spellings.setdefault(name, []).append(path)
+        if names.setdefault(name, blob) != blob:
+            names[name] = None
+
+    collisions = [(name, spellings[name]) for name, blob in names.items() if blob is None]
+    names = {name: blob for name, blob in names.items() if blob is not None}
+
+    manifest = {
+        'format': FORMAT,
+        'blobs': blobs,
+        'names': dict(sorted(names.items())),
+    }
+    return manifest, duplicates, collisions
+
+def write_manifest(manifest, path=MANIFEST_PATH):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+        f.write('\n')
+
+def resolve(manifest, name):
+    """URL of the stored copy of a name such as 'audio/ORDIN_A.wav', or None"""
+    blob = manifest['names'].get(name.lower())
+    return manifest['blobs'][blob] if blob else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Index data/audio and the sound library by content and "
+                                                 "write the name -> blob manifest the site resolves through")
+    parser.parse_args()
+
+    files = scan_audio()
+    manifest, duplicates, collisions = build_manifest(files)
+    if collisions:
+        # One of the spellings would silently shadow the other on the site
+        for name, paths in collisions:
+            print(f"Name collision: {', '.join(store_url(path) for path in paths)} differ only in case "
+                  f"but not in content")
+        sys.exit(f"{len(collisions)} name collisions; rename one file of each pair. Manifest not written.")
+
+    saved = sum(path.stat().st_size for path in duplicates)
+    for path in duplicates:
+        print(f'Duplicate: {store_name(path)} -> {manifest["blobs"][manifest["names"][store_name(path)]]}')
+
+    write_manifest(manifest)
+
+    print(f'\nIndexed {len(files)} files as {len(manifest["blobs"])} blobs '
+          f'({len(manifest["names"])} names)')
+    print(f'Duplicates: {len(duplicates)} ({saved / 1024:.1f} KB not downloaded twice)')
+    print(f'Manifest: {MANIFEST_PATH.relative_to(REPO_DIR)}')
+
+if __name__ == '__main__':
+    main()
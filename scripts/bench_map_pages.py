@@ -0,0 +1,97 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from map_template import Template, flatten, render_pages
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+template_path = ROOT_DIR / 'maps' / 'm' / 'template.html'
+map_data_path = ROOT_DIR / 'data' / 'maps' / 'vsrmaplist.json'
+
+# The generator's file name is not importable as a module name
+spec = importlib.util.spec_from_file_location('generate_map_pages', Path(__file__).parent / 'generate-map-pages.py')
+generate_map_pages = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(generate_map_pages)
+
+def synthetic_maps(count, seed=0):
+    """count maps shaped like vsrmaplist.json entries, cycling through the real ones with unique Files"""
+    with open(map_data_path, 'r', encoding='utf-8') as f:
+        real_maps = json.load(f)
+    rng = random.Random(seed)
+    maps = []
+    for i in range(count):
+        map_info = json.loads(json.dumps(real_maps[i % len(real_maps)]))
+        map_info['File'] = f"{map_info['File']}_{i}"
+        map_info['Pools'] = rng.randint(2, 12)
+        map_info['formatted_description'] = generate_map_pages.format_description(map_info)
+        maps.append(map_info)
+    return maps
+
+def replace_render(template_text, map_info):
+    """The previous renderer: one html.replace per key and sub-key"""
+    html = template_text
+    for key, value in map_info.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                html = html.replace(f'{{{{map.{key}.{sub_key}}}}}', str(sub_value))
+        else:
+            html = html.replace(f'{{{{map.{key}}}}}', str(value))
+    return html
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled map page template")
+    parser.add_argument('--maps', type=int, default=10000, help="synthetic maps to render (default: 10000)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="processes for the parallel write (default: one per core)")
+    args = parser.parse_args()
+
+    with open(template_path, 'r', encoding='utf-8') as f:
+        template_text = f.read()
+    maps = synthetic_maps(args.maps)
+
+    start = time.perf_counter()
+    expected = [replace_render(template_text, map_info) for map_info in maps]
+    replace_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    template = Template(template_text)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rendered = [template.render(flatten(map_info))[0] for map_info in maps]
+    render_time = time.perf_counter() - start
+
+    mismatched = sum(a != b for a, b in zip(expected, rendered))
+
+    # Each pass writes into a fresh folder, so neither overwrites pages the other made
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        render_pages(template, maps, os.path.join(tmp, 'serial'), 1)
+        serial_time = time.perf_counter() - start
+
+        # One worker would just repeat the serial pass
+        parallel_time = None
+        if args.workers > 1:
+            start = time.perf_counter()
+            render_pages(template, maps, os.path.join(tmp, 'pool'), args.workers)
+            parallel_time = time.perf_counter() - start
+
+    print(f"{len(maps)} maps, template {len(template_text) / 1024:.1f} KB with {len(template.slots)} placeholders")
+    print(f"html.replace render:      {replace_time * 1e3:8.1f} ms ({replace_time / len(maps) * 1e6:.1f} us/map)")
+    print(f"compiled render:          {render_time * 1e3:8.1f} ms ({render_time / len(maps) * 1e6:.1f} us/map), "
+          f"compile {compile_time * 1e3:.2f} ms, {replace_time / render_time:.1f}x faster")
+    print(f"render + write, 1 worker: {serial_time * 1e3:8.1f} ms")
+    if parallel_time is None:
+        print("render + write, pool:     skipped (--workers 1)")
+    else:
+        print(f"render + write, {args.workers} workers: {parallel_time * 1e3:8.1f} ms "
+              f"({serial_time / parallel_time:.1f}x)")
+    print(f"Pages differing from html.replace: {mismatched}")
+
+if __name__ == '__main__':
+    main()
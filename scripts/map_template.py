@@ -0,0 +1,100 @@
+import os
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# {{map.Key}} or {{map.Key.subKey}}
+PLACEHOLDER = re.compile(r'\{\{map\.(\w+(?:\.\w+)?)\}\}')
+
+def flatten(map_info):
+    """Template values of one map: top-level keys, plus "Key.subKey" for nested objects like Size"""
+    values = {}
+    for key, value in map_info.items():
+        if isinstance(value, dict):
+            for sub_key, sub_value in value.items():
+                values[f'{key}.{sub_key}'] = str(sub_value)
+        else:
+            values[key] = str(value)
+    return values
+
+class Template:
+    """A page template compiled once into alternating literal and slot segments
+
+    Rendering fills the slots and joins the segments in one pass, so the
+    cost per page is the size of the output rather than placeholders x
+    template size.
+    """
+
+    def __init__(self, text):
+        self.literals = []
+        self.slots = []
+        position = 0
+        for match in PLACEHOLDER.finditer(text):
+            self.literals.append(text[position:match.start()])
+            self.slots.append(match.group(1))
+            position = match.end()
+        self.literals.append(text[position:])
+        self.names = set(self.slots)
+
+    def render(self, values):
+        """Return (html, missing): missing lists placeholders without a value, which render empty"""
+        parts = [self.literals[0]]
+        missing = []
+        for name, literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name)
+            if value is None:
+                missing.append(name)
+                value = ''
+            parts.append(value)
+            parts.append(literal)
+        return ''.join(parts), missing
+
+    def unused(self, values):
+        """Keys of values that no placeholder uses"""
+        return set(values) - self.names
+
+def render_chunk(template, maps, output_dir):
+    """Render and write the pages of a list of maps; returns missing placeholder counts by map"""
+    missing = {}
+    for map_info in maps:
+        html, map_missing = template.render(flatten(map_info))
+        if map_missing:
+            missing[map_info['File']] = map_missing
+        map_dir = os.path.join(output_dir, map_info['File'])
+        os.makedirs(map_dir, exist_ok=True)
+        with open(os.path.join(map_dir, 'index.html'), 'w', encoding='utf-8') as f:
+            f.write(html)
+    return missing
+
+def render_pages(template, maps, output_dir, workers=None, chunk_size=256):
+    """Write output_dir/<File>/index.html for every map, in parallel chunks
+
+    Returns (missing, unused): missing maps each map File to the
+    placeholders it had no value for; unused counts the map keys no
+    placeholder uses, by how many maps have them.
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [maps[i:i + chunk_size] for i in range(0, len(maps), chunk_size)]
+    missing = {}
+    if workers == 1 or len(chunks) == 1:
+        for chunk in chunks:
+            missing.update(render_chunk(template, chunk, output_dir))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk_missing in pool.map(render_chunk, [template] * len(chunks), chunks,
+                                          [output_dir] * len(chunks)):
+                missing.update(chunk_missing)
+
+    unused = Counter()
+    for map_info in maps:
+        unused.update(template.unused(flatten(map_info)))
+    return missing, unused
+
+def print_report(missing, unused):
+    """Print placeholders that had no value and map data the template never uses"""
+    counts = Counter(name for names in missing.values() for name in set(names))
+    for name, count in sorted(counts.items()):
+        examples = ', '.join(sorted(file for file, names in missing.items() if name in names)[:3])
+        print(f'Missing: {{{{map.{name}}}}} in {count} maps (e.g. {examples})')
+    for name, count in sorted(unused.items()):
+        print(f'Unused: map.{name} ({count} maps)')
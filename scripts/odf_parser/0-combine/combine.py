@@ -1,14 +1,25 @@
+import argparse
 import json
+import sys
+import zipfile
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from itertools import islice
 from pathlib import Path
 
+# Value parsing shared with the other stages lives next to Parse-ODF-Data.py
+if str(Path(__file__).resolve().parent.parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from odf_values import parse_number, strip_comment
+
 ROOT_DIR = Path(__file__).resolve().parent
 src_path = ROOT_DIR / 'src'
 
-print(f"\nScanning directory: {src_path}")
-print("-" * 50)
-
-# Combine all JSON files into one dictionary
-all_data = {}
+def span(name, count=None):
+    """Time a sub-step; Parse-ODF-Data.py --trace swaps in its tracer, otherwise a no-op"""
+    return nullcontext()
 
 def clean_value(value):
     if isinstance(value, str):
@@ -22,28 +33,404 @@ def clean_dict(d):
             clean_dict(v) if isinstance(v, dict) else v 
             for k, v in d.items()}
 
-for json_file in src_path.glob('*.json'):
-    print(f"Found JSON file: {json_file.name}")
-    with open(json_file, 'r') as f:
-        file_data = json.load(f)
-        print(f"  - Contains {len(file_data)} objects")
-        
-        # Clean each object's data and ensure ODF keys are lowercase
-        cleaned_data = {}
-        for k, v in file_data.items():
-            # Convert key to lowercase and ensure .odf extension is lowercase
-            new_key = k.lower()
-            if not new_key.endswith('.odf'):
-                new_key += '.odf'
-            cleaned_data[new_key] = clean_dict(v)
+def coerce_value(value):
+    """Convert an ODF string value to a number, a list of numbers, or a tidied string
+    
+    Trailing // comments and stray unbalanced quotes are dropped; a // inside
+    quotes, as in a path or URL, is kept. Colors and vectors such as
+    "255 255 100 250" become lists of numbers.
+    """
+    if not isinstance(value, str):
+        return value
+    text = strip_comment(value).strip()
+    if text.count('"') % 2 == 1 or (text.startswith('"') and text.endswith('"') and text.count('"') == 2):
+        text = text.strip('"').strip()
+
+    number = parse_number(text)
+    if number is not None:
+        return number
+
+    parts = text.replace(',', ' ').split()
+    if len(parts) > 1:
+        numbers = [parse_number(part) for part in parts]
+        if all(n is not None for n in numbers):
+            return numbers
+
+    return text
+
+def coerce_object(odf_data, keep_raw=False):
+    """Coerce every section value of an object
+    
+    With keep_raw the original text of each changed value is kept under
+    rawValues.<section>.<key>.
+    """
+    coerced = {}
+    raw_values = {}
+    for section, class_data in odf_data.items():
+        if not isinstance(class_data, dict):
+            coerced[section] = class_data
+            continue
+        coerced[section] = {}
+        for key, value in class_data.items():
+            new_value = coerce_value(value)
+            coerced[section][key] = new_value
+            if keep_raw and new_value != value:
+                raw_values.setdefault(section, {})[key] = value
+    if raw_values:
+        coerced['rawValues'] = raw_values
+    return coerced
+
+def clean_object(odf_data, typed=False, keep_raw=False):
+    """Strip quotes from every value, then optionally coerce value types"""
+    cleaned = clean_dict(odf_data)
+    return coerce_object(cleaned, keep_raw) if typed else cleaned
+
+def combine_files(src_path, typed=False, keep_raw=False):
+    """Combine all source JSON files into one dictionary keyed by lowercase ODF name
+    
+    With typed=True values are also coerced to numbers and numeric lists
+    (see coerce_value), optionally keeping the raw text.
+    """
+    all_data = {}
+    for json_file in src_path.glob('*.json'):
+        print(f"Found JSON file: {json_file.name}")
+        with span(json_file.name, lambda: len(file_data)), open(json_file, 'r') as f:
+            file_data = json.load(f)
+            print(f"  - Contains {len(file_data)} objects")
             
-        all_data.update(cleaned_data)
+            # Clean each object's data and ensure ODF keys are lowercase
+            cleaned_data = {}
+            for k, v in file_data.items():
+                # Convert key to lowercase and ensure .odf extension is lowercase
+                cleaned_data[odf_key_name(k)] = clean_object(v, typed, keep_raw)
+                
+            all_data.update(cleaned_data)
+    return all_data
+
+def parse_odf_text(text):
+    """Parse the INI-style text of a raw .odf file into {section: {key: value}}
+    
+    Like the game, section and key names match case-insensitively and the
+    first definition wins: a repeated [Section] only adds keys that were not
+    set before, and a repeated key is ignored. The spelling of the first
+    occurrence is kept. Values keep their quotes so they go through the same
+    cleaning as the extracted JSON sources.
+    """
+    sections = {}
+    section_names = {}
+    key_names = {}
+    current = None
+    current_keys = None
+    for raw_line in text.splitlines():
+        line = strip_comment(raw_line).strip()
+        if not line or line[0] == ';':
+            continue
+        
+        if line[0] == '[':
+            end = line.find(']')
+            name = (line[1:end] if end > 0 else line[1:]).strip()
+            name = section_names.setdefault(name.lower(), name)
+            current = sections.setdefault(name, {})
+            current_keys = key_names.setdefault(name, set())
+            continue
+        
+        key, sep, value = line.partition('=')
+        # Keys outside any section are never read by the game
+        if not sep or current is None:
+            continue
+        key = key.strip()
+        if not key or key.lower() in current_keys:
+            continue
+        current_keys.add(key.lower())
+        current[key] = value.strip()
+    return sections
+
+def parse_odf_job(job, typed=False, keep_raw=False):
+    """Parse one queued .odf (a file path or raw bytes from an archive) in a worker"""
+    name, source = job
+    data = Path(source).read_bytes() if isinstance(source, str) else source
+    # ODFs are plain ANSI text; latin-1 maps every byte so decoding never fails
+    return name, clean_object(parse_odf_text(data.decode('latin-1')), typed, keep_raw)
+
+def parse_odf_batch(jobs, typed=False, keep_raw=False):
+    """Parse a list of queued .odf jobs in one worker call"""
+    return [parse_odf_job(job, typed, keep_raw) for job in jobs]
+
+def parse_in_pool(pool, jobs, in_flight, batch_size=64, typed=False, keep_raw=False):
+    """Parse jobs in the pool a batch at a time, yielding results in job order
+    
+    At most in_flight batches are queued, so archive members are read only
+    as workers catch up instead of all being held in memory at once.
+    """
+    jobs = iter(jobs)
+    pending = deque()
+    while True:
+        batch = list(islice(jobs, batch_size))
+        if batch:
+            pending.append(pool.submit(parse_odf_batch, batch, typed, keep_raw))
+        if pending and (len(pending) >= in_flight or not batch):
+            yield from pending.popleft().result()
+        elif not batch:
+            return
+
+def canonical_names(all_data, preferred=None):
+    """Spell every section and key name one way across all objects
+    
+    Files may write the same section as [CraftClass] in one ODF and
+    [craftclass] in another, and merge_dicts matches names exactly, so a
+    child would not override its parent. Each name takes the spelling used
+    by most files (the first seen on a tie), unless preferred, a combined
+    map such as the base data under a mod, already spells it.
+    """
+    def choose(counts, preferred_spellings):
+        by_lower = {}
+        for spelling, _ in counts.most_common():
+            by_lower.setdefault(spelling.lower(), spelling)
+        for spelling in preferred_spellings:
+            by_lower[spelling.lower()] = spelling
+        return by_lower
+    
+    section_counts = Counter()
+    key_counts = Counter()
+    for odf_data in all_data.values():
+        for section, class_data in odf_data.items():
+            section_counts[section] += 1
+            if isinstance(class_data, dict):
+                key_counts.update(class_data.keys())
+    preferred_sections, preferred_keys = set(), set()
+    for odf_data in (preferred or {}).values():
+        for section, class_data in odf_data.items():
+            preferred_sections.add(section)
+            if isinstance(class_data, dict):
+                preferred_keys.update(class_data)
+    sections = choose(section_counts, preferred_sections)
+    keys = choose(key_counts, preferred_keys)
+    
+    for name, odf_data in all_data.items():
+        if any(sections[section.lower()] != section for section in odf_data) or any(
+                keys[key.lower()] != key for class_data in odf_data.values()
+                if isinstance(class_data, dict) for key in class_data):
+            all_data[name] = {
+                sections[section.lower()]: ({keys[key.lower()]: value for key, value in class_data.items()}
+                                            if isinstance(class_data, dict) else class_data)
+                for section, class_data in odf_data.items()
+            }
+    return all_data
+
+def iter_odf_jobs(sources):
+    """Yield (odf key, path or bytes) for every .odf in the given directories and .zip archives"""
+    for source in map(Path, sources):
+        count = 0
+        if source.is_dir():
+            for path in sorted(source.rglob('*')):
+                if path.suffix.lower() == '.odf' and path.is_file():
+                    count += 1
+                    yield path.name.lower(), str(path)
+        elif zipfile.is_zipfile(source):
+            with zipfile.ZipFile(source) as archive:
+                for member in sorted(archive.namelist()):
+                    if member.lower().endswith('.odf'):
+                        count += 1
+                        yield Path(member).name.lower(), archive.read(member)
+        else:
+            print(f"Warning: Skipping {source}, not a directory or .zip archive")
+            continue
+        print(f"Found {count} ODF files in {source}")
+
+def ingest_odf_sources(sources, typed=False, keep_raw=False, workers=None, preferred_names=None):
+    """Parse raw .odf files from directories and archives into the combined map
+    
+    Files are parsed in order and streamed into the result, so when the
+    same ODF name appears more than once (a mod overriding the game
+    install) the later source wins. Parsing runs in-process unless workers
+    is above 1; parsing is cheap next to moving the text between processes,
+    so the pool only pays off on large trees with several cores. Section
+    and key names are then spelled consistently (see canonical_names).
+    """
+    all_data = {}
+    overridden = 0
+    parse = partial(parse_odf_job, typed=typed, keep_raw=keep_raw)
+    
+    def collect(results):
+        nonlocal overridden
+        for name, odf_data in results:
+            if name in all_data:
+                overridden += 1
+            all_data[name] = odf_data
+    
+    with span('parse .odf files', lambda: len(all_data)):
+        if not workers or workers == 1:
+            collect(map(parse, iter_odf_jobs(sources)))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                collect(parse_in_pool(pool, iter_odf_jobs(sources), in_flight=workers * 2,
+                                      typed=typed, keep_raw=keep_raw))
+    
+    with span('canonical names'):
+        canonical_names(all_data, preferred_names)
+    
+    if overridden:
+        print(f"  - {overridden} ODFs overridden by later sources")
+    return all_data
+
+def odf_key_name(name):
+    """Lowercase an ODF name and make sure it ends in .odf"""
+    key = name.lower()
+    if not key.endswith('.odf'):
+        key += '.odf'
+    return key
+
+def iter_json_items(path, chunk_size=1 << 16):
+    """Yield (key, value) pairs of a top-level JSON object without loading the whole file
+    
+    Only the current item and a read buffer are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r') as f:
+        buffer = ''
+        pos = 0
+        eof = False
+        
+        def fill(size):
+            nonlocal buffer, pos, eof
+            chunk = f.read(size)
+            eof = not chunk
+            buffer = buffer[pos:] + chunk
+            pos = 0
+        
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos].isspace():
+                    pos += 1
+                if pos < len(buffer) or eof:
+                    return
+                fill(chunk_size)
+        
+        def expect(chars):
+            nonlocal pos
+            skip_whitespace()
+            if pos >= len(buffer) or buffer[pos] not in chars:
+                raise ValueError(f"{path}: expected one of {chars!r} at offset {pos}")
+            pos += 1
+            return buffer[pos - 1]
+        
+        def decode():
+            nonlocal pos
+            skip_whitespace()
+            size = chunk_size
+            while True:
+                try:
+                    value, end = decoder.raw_decode(buffer, pos)
+                    # A token ending exactly at the buffer edge may continue in the next chunk
+                    if end < len(buffer) or eof:
+                        pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill(size)
+                size *= 2
+        
+        fill(chunk_size)
+        expect('{')
+        skip_whitespace()
+        if pos < len(buffer) and buffer[pos] == '}':
+            return
+        while True:
+            key = decode()
+            expect(':')
+            yield key, decode()
+            if expect(',}') == '}':
+                return
+
+def stream_combine(src_path, output_path, typed=False, keep_raw=False):
+    """Combine src/*.json into output_path with memory bounded by the largest object
+    
+    Writes the same bytes as combine_files + write_combined. A first pass
+    reads only keys, to find ODFs that a later file overrides; only those
+    overriding objects are kept in memory. The second pass streams every
+    object out at the position of its first occurrence, as dict.update would.
+    Returns the number of objects written.
+    """
+    json_files = list(src_path.glob('*.json'))
+    
+    # Pass 1: which keys repeat, and their final (last) values
+    seen = set()
+    repeated = set()
+    for json_file in json_files:
+        for name, _ in iter_json_items(json_file):
+            key = odf_key_name(name)
+            if key in seen:
+                repeated.add(key)
+            seen.add(key)
+    overrides = {}
+    if repeated:
+        for json_file in json_files:
+            for name, odf_data in iter_json_items(json_file):
+                key = odf_key_name(name)
+                if key in repeated:
+                    overrides[key] = odf_data
+    
+    # Pass 2: stream each object out once, with the same layout as json.dump(indent=4)
+    written = set()
+    with open(output_path, 'w') as f:
+        f.write('{')
+        for json_file in json_files:
+            print(f"Streaming JSON file: {json_file.name}")
+            for name, odf_data in iter_json_items(json_file):
+                key = odf_key_name(name)
+                if key in written:
+                    continue
+                odf_data = clean_object(overrides.get(key, odf_data), typed, keep_raw)
+                item = json.dumps({key: odf_data}, indent=4)
+                f.write(('\n' if not written else ',\n') + item[2:-2])
+                written.add(key)
+        f.write('\n}' if written else '}')
+    return len(written)
+
+def write_combined(all_data, output_path):
+    """Write the combined data as pretty-printed JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(all_data, f, indent=4)
+
+def main():
+    parser = argparse.ArgumentParser(description="Combine ODF data into All-ODF-Data.json")
+    parser.add_argument('--odf', action='append', metavar='PATH',
+                        help="read raw .odf files from a directory tree or .zip archive instead of src/*.json "
+                             "(repeatable, later sources override earlier ones)")
+    parser.add_argument('--workers', type=int, help="worker processes for --odf (default: parse in-process)")
+    parser.add_argument('--typed', action='store_true', help="coerce numbers, colors and vectors to JSON types")
+    parser.add_argument('--stream', action='store_true',
+                        help="stream src/*.json to the output one object at a time to bound memory use")
+    args = parser.parse_args()
+    output_path = ROOT_DIR / 'All-ODF-Data.json'
+
+    if args.stream:
+        print(f"\nStreaming directory: {src_path}")
+        print("-" * 50)
+        count = stream_combine(src_path, output_path, typed=args.typed)
+        print(f"\nTotal objects combined: {count}")
+        print(f"\nOutput written to: {output_path}")
+        return
+
+    if args.odf:
+        print(f"\nIngesting raw ODF sources: {', '.join(args.odf)}")
+        print("-" * 50)
+        all_data = ingest_odf_sources(args.odf, typed=args.typed, workers=args.workers)
+    else:
+        print(f"\nScanning directory: {src_path}")
+        print("-" * 50)
+
+        # Combine all JSON files into one dictionary
+        all_data = combine_files(src_path, typed=args.typed)
+
+    print(f"\nTotal objects combined: {len(all_data)}")
 
-print(f"\nTotal objects combined: {len(all_data)}")
+    # Write the combined data to a new file in the 0-combine folder
+    write_combined(all_data, output_path)
 
-# Write the combined data to a new file in the 0-combine folder
-output_path = ROOT_DIR / 'All-ODF-Data.json'
-with open(output_path, 'w') as f:
-    json.dump(all_data, f, indent=4)
+    print(f"\nOutput written to: {output_path}")
 
-print(f"\nOutput written to: {output_path}")
+if __name__ == "__main__":
+    main()
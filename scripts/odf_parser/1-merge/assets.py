@@ -0,0 +1,97 @@
+import json
+from collections import defaultdict
+from pathlib import PurePath
+
+FORMAT = "odf-assets-1"
+
+# Asset file extensions and the kind of asset they are
+ASSET_TYPES = {
+    ".wav": "sound",
+    ".ogg": "sound",
+    ".tga": "texture",
+    ".dds": "texture",
+    ".png": "texture",
+    ".pic": "texture",
+    ".xsi": "model",
+    ".fbx": "model",
+    ".msh": "model",
+    ".inf": "info",
+    ".bzn": "map",
+}
+
+def asset_value(value):
+    """Return (lowercase asset name, spelling) if a value names an asset file, else None"""
+    if not isinstance(value, str):
+        return None
+    value = value.split('//')[0].strip().strip('"').strip()
+    asset_type = ASSET_TYPES.get(PurePath(value).suffix.lower())
+    if not asset_type or '/' in value or '\\' in value:
+        return None
+    return value.lower(), value
+
+class AssetIndex:
+    """Forward and reverse index of the asset files ODF objects reference
+
+    Built in one pass over every value of every section of the merged
+    objects, including embedded Ordnance.* and Powerup.* sections and the
+    explosions and effects no category publishes, whose sounds, textures
+    and models are referenced nowhere else. Assets are keyed by lowercase
+    name, as the game looks them up case-insensitively; the spellings used
+    are kept so files can be published under the names the data asks for.
+    """
+
+    def __init__(self, data):
+        self.types = {}
+        self.spellings = defaultdict(list)
+        self.reverse = defaultdict(list)
+        self.forward = {}
+
+        for odf_name, odf_data in data.items():
+            assets = []
+            for section, class_data in odf_data.items():
+                if not isinstance(class_data, dict):
+                    continue
+                for key, value in class_data.items():
+                    found = asset_value(value)
+                    if found is None:
+                        continue
+                    asset, spelling = found
+                    self.types[asset] = ASSET_TYPES[PurePath(asset).suffix]
+                    if spelling not in self.spellings[asset]:
+                        self.spellings[asset].append(spelling)
+                    self.reverse[asset].append((odf_name, section, key))
+                    if asset not in assets:
+                        assets.append(asset)
+            if assets:
+                self.forward[odf_name] = assets
+
+    def assets(self, asset_type=None):
+        """Return every referenced asset name, optionally of one type"""
+        return sorted(asset for asset, kind in self.types.items() if asset_type is None or kind == asset_type)
+
+    def referrers(self, asset):
+        """Return (odf name, section, key) for every reference to an asset"""
+        return self.reverse.get(asset.lower(), [])
+
+    def to_json(self):
+        """Compact form: ODF names listed once and referenced by position"""
+        odfs = list(self.forward)
+        odf_ids = {odf_name: i for i, odf_name in enumerate(odfs)}
+        return {
+            "format": FORMAT,
+            "odfs": odfs,
+            "assets": {
+                asset: {
+                    "type": self.types[asset],
+                    "spellings": self.spellings[asset],
+                    "refs": [[odf_ids[odf_name], f"{section}.{key}"] for odf_name, section, key in self.reverse[asset]],
+                }
+                for asset in sorted(self.types)
+            },
+            "forward": [self.forward[odf_name] for odf_name in odfs],
+        }
+
+def write_assets(merged_data, output_path):
+    """Write the asset index of every merged object as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(AssetIndex(merged_data).to_json(), f, separators=(',', ':'))
@@ -0,0 +1,143 @@
+import json
+from collections.abc import Mapping
+
+FORMAT = "odf-delta-1"
+
+def diff_object(base_obj, obj):
+    """Describe how obj differs from base_obj, or None when they are equal
+
+    Sections (dict entries) present in both are compared key by key and
+    only changed keys are stored; anything else that changed, such as a
+    new section or inheritanceChain, is stored whole. Orders are recorded
+    only when applying the change would not reproduce them.
+    """
+    sections, values, removed, removed_keys, key_order = {}, {}, [], {}, {}
+    for name, value in obj.items():
+        base_value = base_obj.get(name)
+        if name not in base_obj:
+            values[name] = value
+        elif isinstance(value, dict) and isinstance(base_value, dict):
+            if value == base_value:
+                continue
+            changed = {key: item for key, item in value.items()
+                       if key not in base_value or base_value[key] != item}
+            gone = [key for key in base_value if key not in value]
+            if changed:
+                sections[name] = changed
+            if gone:
+                removed_keys[name] = gone
+            expected = [key for key in base_value if key in value] + [key for key in value if key not in base_value]
+            if expected != list(value):
+                key_order[name] = list(value)
+        elif value != base_value:
+            values[name] = value
+    removed = [name for name in base_obj if name not in obj]
+
+    entry = {}
+    for field, content in (('sections', sections), ('values', values), ('remove', removed),
+                           ('removeKeys', removed_keys), ('keyOrder', key_order)):
+        if content:
+            entry[field] = content
+    expected = [name for name in base_obj if name in obj] + [name for name in obj if name not in base_obj]
+    if expected != list(obj):
+        entry['order'] = list(obj)
+    return entry or None
+
+def apply_object(base_obj, entry):
+    """Build an object from its base and a diff_object() entry
+
+    Only the sections the entry touches are copied; every other section is
+    the base's own dict, shared rather than duplicated.
+    """
+    obj = dict(base_obj)
+    for name in entry.get('remove', []):
+        del obj[name]
+    for name, changed in entry.get('sections', {}).items():
+        obj[name] = {**obj[name], **changed}
+    for name, keys in entry.get('removeKeys', {}).items():
+        if obj[name] is base_obj.get(name):
+            obj[name] = dict(obj[name])
+        for key in keys:
+            del obj[name][key]
+    for name, order in entry.get('keyOrder', {}).items():
+        obj[name] = {key: obj[name][key] for key in order}
+    obj.update(entry.get('values', {}))
+    if 'order' in entry:
+        obj = {name: obj[name] for name in entry['order']}
+    return obj
+
+def diff_data(base, data):
+    """Build a delta that turns base into data, keyed by ODF name"""
+    objects = {}
+    for odf_name, odf_data in data.items():
+        if odf_name not in base:
+            objects[odf_name] = {'values': odf_data}
+        elif odf_data is not base[odf_name]:
+            entry = diff_object(base[odf_name], odf_data)
+            if entry:
+                objects[odf_name] = entry
+
+    delta = {'format': FORMAT, 'objects': objects}
+    removed = [odf_name for odf_name in base if odf_name not in data]
+    if removed:
+        delta['removed'] = removed
+    expected = [odf_name for odf_name in base if odf_name in data] + [odf_name for odf_name in data if odf_name not in base]
+    if expected != list(data):
+        delta['order'] = list(data)
+    return delta
+
+class LayeredData(Mapping):
+    """Read-only view of base data with a delta applied on top
+
+    Objects the delta does not touch are returned straight from base, and
+    touched objects share their untouched sections with it, so a layer
+    costs memory in proportion to its changes. Resolved objects are cached.
+    base can itself be a LayeredData, so mods can stack.
+    """
+
+    def __init__(self, base, delta):
+        if delta.get('format') != FORMAT:
+            raise ValueError(f"Unsupported ODF delta format: {delta.get('format')}")
+        self.base = base
+        self.delta = delta
+        self.resolved = {}
+        removed = set(delta.get('removed', []))
+        if 'order' in delta:
+            self.names = delta['order']
+        else:
+            self.names = [odf_name for odf_name in base if odf_name not in removed]
+            self.names += [odf_name for odf_name in delta['objects'] if odf_name not in base]
+        self.removed = removed
+
+    def __getitem__(self, odf_name):
+        entry = self.delta['objects'].get(odf_name)
+        if entry is None:
+            if odf_name in self.removed:
+                raise KeyError(odf_name)
+            return self.base[odf_name]
+        if odf_name not in self.resolved:
+            base_obj = self.base[odf_name] if odf_name in self.base else {}
+            self.resolved[odf_name] = apply_object(base_obj, entry)
+        return self.resolved[odf_name]
+
+    def __contains__(self, odf_name):
+        return odf_name in self.delta['objects'] or (odf_name in self.base and odf_name not in self.removed)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+def apply_delta(base, delta):
+    """Resolve a delta against base into a plain dict, in the layer's order"""
+    return dict(LayeredData(base, delta).items())
+
+def load_delta(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def write_delta(delta, output_path):
+    """Write a delta as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(delta, f, separators=(',', ':'))
@@ -1,10 +1,42 @@
 import json
+from contextlib import nullcontext
 from pathlib import Path
-from copy import deepcopy
+
+from layers import diff_data
+from references import ReferenceGraph
+from techtree import build_tech_trees, write_index
+
+def span(name, count=None):
+    """Time a sub-step; Parse-ODF-Data.py --trace swaps in its tracer, otherwise a no-op"""
+    return nullcontext()
+
+class MergedData(dict):
+    """Merged ODF objects, carrying the reference graph the merge built over them
+
+    The graph travels with the stage output (it pickles with the dict into
+    the stage cache), so the reference and tech tree writers reuse it.
+    """
+
+    def __init__(self, data, graph):
+        super().__init__(data)
+        self.graph = graph
+
+def reference_graph(merged_data):
+    """The graph merge_odf_data built, or a new one for merged data read back from JSON"""
+    graph = getattr(merged_data, 'graph', None)
+    return graph if graph is not None else ReferenceGraph(merged_data)
+
+def copy_value(value):
+    """Copy nested dictionaries and lists, sharing immutable leaves"""
+    if isinstance(value, dict):
+        return {k: copy_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [copy_value(v) for v in value]
+    return value
 
 def merge_dicts(child, parent):
     """Deep merge two dictionaries, with child values taking precedence"""
-    result = deepcopy(parent)
+    result = copy_value(parent)
     
     for key, value in child.items():
         if key in result and isinstance(value, dict) and isinstance(result[key], dict):
@@ -12,7 +44,7 @@ def merge_dicts(child, parent):
             result[key] = merge_dicts(value, result[key])
         else:
             # Use child's value
-            result[key] = deepcopy(value)
+            result[key] = copy_value(value)
     
     return result
 
@@ -23,87 +55,95 @@ def find_class_label(obj_data):
             return class_obj.get("classLabel")
     return None
 
-def process_inheritance(obj_name, obj_data, all_data, processed=None):
-    """Process inheritance chain for an object"""
-    if processed is None:
-        processed = set()
-    
-    # Avoid circular inheritance
-    if obj_name in processed:
-        return obj_data
-    processed.add(obj_name)
-    
-    # Initialize inheritance chain if not present
-    if "inheritanceChain" not in obj_data:
-        obj_data["inheritanceChain"] = []
+def build_name_index(all_data):
+    """Map lowercase ODF names to their actual key in all_data (first match wins)"""
+    index = {}
+    for name in all_data:
+        index.setdefault(name.lower(), name)
+    return index
+
+def resolve_root(obj_data, class_label):
+    """Resolve an object with no parent ODF; the classLabel ends its chain"""
+    chain = list(obj_data.get("inheritanceChain", []))
+    if class_label and class_label not in chain:
+        chain.append(class_label)
+    resolved = copy_value(obj_data)
+    resolved["inheritanceChain"] = chain
+    return resolved
+
+def resolve_child(obj_data, class_label, parent_data):
+    """Merge an already resolved parent into a child, with child taking precedence"""
+    child = dict(obj_data)
+    child.setdefault("inheritanceChain", [])
+    merged_data = merge_dicts(child, parent_data)
     
-    # Get the classLabel from any property object
-    class_label = find_class_label(obj_data)
-    if not class_label:
-        return obj_data
-        
-    # Look for parent object (classLabel.odf), case insensitive
-    parent_name = f"{class_label.lower()}.odf"
-    parent_exists = False
-    
-    # Try to find the parent ODF with case-insensitive match
-    for existing_name in all_data:
-        if existing_name.lower() == parent_name:
-            parent_name = existing_name  # Use the actual case from all_data
-            parent_exists = True
-            break
-    
-    if not parent_exists:
-        # Add current classLabel to chain if this is the end and not already in chain
-        if class_label not in obj_data["inheritanceChain"]:
-            obj_data["inheritanceChain"].append(class_label)
-        return obj_data
-    
-    # Get parent data and process its inheritance first
-    parent_data = process_inheritance(parent_name, all_data[parent_name], all_data, processed)
-    
-    # Merge parent into child, with child taking precedence
-    merged_data = merge_dicts(obj_data, parent_data)
-    
-    # Update inheritance chain
-    parent_chain = parent_data.get("inheritanceChain", [])
-    # Create new chain starting with current classLabel
-    new_chain = []
-    if class_label not in new_chain:
-        new_chain.append(class_label)
-    # Add parent chain items if not already present
-    for label in parent_chain:
+    # Create new chain starting with current classLabel, then the parent chain
+    new_chain = [class_label]
+    for label in parent_data.get("inheritanceChain", []):
         if label not in new_chain:
             new_chain.append(label)
     merged_data["inheritanceChain"] = new_chain
     
     return merged_data
 
-def process_ordnance_references(merged_data):
-    """Process WeaponClass.ordName references and merge ordnance data"""
-    for odf_name, odf_data in merged_data.items():
-        # Check if object has WeaponClass with ordName
-        weapon_class = odf_data.get('WeaponClass', {})
-        ord_name = weapon_class.get('ordName', '')
+def resolve_inheritance(all_data):
+    """Resolve the classLabel inheritance chain of every object in all_data
+    
+    Parents are looked up through a lowercase name index and each object is
+    resolved exactly once, ancestors first, so every merge reuses the cached
+    result of its parent. Returns (merged_data, cycles), with merged_data in
+    the same order as all_data. Inheritance cycles are reported and broken at
+    the back edge, which is merged in unresolved.
+    """
+    index = build_name_index(all_data)
+    parents = {}
+    for obj_name, obj_data in all_data.items():
+        class_label = find_class_label(obj_data)
+        parent_name = index.get(f"{class_label.lower()}.odf") if class_label else None
+        parents[obj_name] = (class_label, parent_name)
+    
+    resolved = {}
+    cycles = []
+    for obj_name in all_data:
+        # Walk up the chain until we reach a resolved ancestor, a root or a cycle
+        path = []
+        on_path = set()
+        current = obj_name
+        while current is not None and current not in resolved:
+            if current in on_path:
+                cycle = path[path.index(current):]
+                cycles.append(cycle)
+                print(f"Warning: Inheritance cycle detected: {' -> '.join(cycle + [current])}")
+                break
+            path.append(current)
+            on_path.add(current)
+            current = parents[current][1]
         
-        # Skip empty or NULL references
-        if not ord_name or ord_name.upper() == 'NULL':
+        # Resolve the collected path top-down so each parent is ready before its children
+        for name in reversed(path):
+            class_label, parent_name = parents[name]
+            if parent_name is None:
+                resolved[name] = resolve_root(all_data[name], class_label)
+            else:
+                parent_data = resolved.get(parent_name, all_data[parent_name])
+                resolved[name] = resolve_child(all_data[name], class_label, parent_data)
+    
+    merged_data = {obj_name: resolved[obj_name] for obj_name in all_data}
+    return merged_data, cycles
+
+def process_ordnance_references(merged_data, graph, normalized=False):
+    """Process WeaponClass.ordName references and merge ordnance data
+    
+    In normalized mode the weapon only links to the ordnance key under
+    links.Ordnance instead of receiving a copy of its classes.
+    """
+    for odf_name, odf_data in merged_data.items():
+        ordnance_name = graph.resolve(odf_name, 'ordnance')
+        if not ordnance_name:
             continue
             
-        # Convert to lowercase and ensure .odf extension
-        ord_name_lower = ord_name.lower()
-        if not ord_name_lower.endswith('.odf'):
-            ord_name_lower += '.odf'
-            
-        # Look up the referenced ordnance ODF with case-insensitive match
-        ordnance_name = None
-        for existing_name in merged_data:
-            if existing_name.lower() == ord_name_lower:
-                ordnance_name = existing_name
-                break
-                
-        if not ordnance_name:
-            print(f"Warning: Could not find ordnance ODF '{ord_name}' referenced by '{odf_name}'")
+        if normalized:
+            odf_data.setdefault('links', {})['Ordnance'] = ordnance_name
             continue
             
         ordnance_data = merged_data[ordnance_name]
@@ -113,30 +153,15 @@ def process_ordnance_references(merged_data):
             prefixed_name = f"Ordnance.{class_name}"
             odf_data[prefixed_name] = class_data
 
-def process_powerup_references(merged_data):
-    """Process WeaponPowerupClass.weaponName references and update powerup/weapon data"""
+def process_powerup_references(merged_data, graph, normalized=False):
+    """Process WeaponPowerupClass.weaponName references and update powerup/weapon data
+    
+    In normalized mode the weapon lists the powerup keys under links.Powerup,
+    in processing order, instead of receiving a copy of their classes.
+    """
     for odf_name, odf_data in merged_data.items():
-        # Check if object is a powerup with WeaponPowerupClass
-        powerup_class = odf_data.get('WeaponPowerupClass', {})
-        weapon_name = powerup_class.get('weaponName', '')
-        
-        if not weapon_name:
-            continue
-            
-        # Convert to lowercase and ensure .odf extension
-        weapon_name_lower = weapon_name.lower()
-        if not weapon_name_lower.endswith('.odf'):
-            weapon_name_lower += '.odf'
-            
-        # Look up the referenced weapon ODF with case-insensitive match
-        weapon_odf_name = None
-        for existing_name in merged_data:
-            if existing_name.lower() == weapon_name_lower:
-                weapon_odf_name = existing_name
-                break
-                
+        weapon_odf_name = graph.resolve(odf_name, 'weapon')
         if not weapon_odf_name:
-            print(f"Warning: Could not find weapon ODF '{weapon_name}' referenced by powerup '{odf_name}'")
             continue
             
         weapon_data = merged_data[weapon_odf_name]
@@ -150,11 +175,71 @@ def process_powerup_references(merged_data):
             if wpn_name:
                 odf_data['GameObjectClass']['unitName'] = wpn_name
         
+        if normalized:
+            weapon_data.setdefault('links', {}).setdefault('Powerup', []).append(odf_name)
+            continue
+        
         # Add powerup data to the weapon object with "Powerup." prefix
         for class_name, class_data in odf_data.items():
             prefixed_name = f"Powerup.{class_name}"
             weapon_data[prefixed_name] = class_data
 
+def merge_odf_data(all_data, normalized=False):
+    """Run inheritance, ordnance and powerup processing over the combined data
+    
+    With normalized=True referenced ordnance and powerups are linked by key
+    rather than embedded under Ordnance.* / Powerup.* (see resolve.py in
+    2-categorize to expand them again).
+    """
+    # Process inheritance
+    with span('inheritance', lambda: len(merged_data)):
+        merged_data, _ = resolve_inheritance(all_data)
+    
+    # Index every cross-reference once and report the unresolved ones together
+    with span('reference graph', lambda: len(graph.forward)):
+        graph = ReferenceGraph(merged_data)
+        graph.report_dangling()
+    
+    # Process ordnance references
+    with span('ordnance refs'):
+        process_ordnance_references(merged_data, graph, normalized)
+    
+    # Process powerup references
+    with span('powerup refs'):
+        process_powerup_references(merged_data, graph, normalized)
+    
+    # Embedding and linking only add sections no reference kind reads, so the graph still holds
+    return MergedData(merged_data, graph)
+
+def merge_layer(base_all, base_merged, overlay_all, normalized=False):
+    """Merge a mod overlay on top of the base data and return it as a delta
+    
+    overlay_all holds the mod's ODFs in combine-stage form; they replace
+    base ODFs of the same name, and the full set is merged again so changed
+    parents, ordnance and powerups reach everything that inherits or embeds
+    them. Only the difference from base_merged is kept (see layers.py).
+    """
+    layered_all = {**base_all, **overlay_all}
+    with span('layer merge', lambda: len(layered_all)):
+        merged_data = merge_odf_data(layered_all, normalized)
+    with span('layer diff', lambda: len(delta['objects'])):
+        delta = diff_data(base_merged, merged_data)
+    return delta
+
+def write_merged(merged_data, output_path):
+    """Write the merged data as pretty-printed JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(merged_data, f, indent=4)
+
+def write_references(merged_data, output_path):
+    """Write the forward/reverse reference index as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(reference_graph(merged_data).to_json(), f, separators=(',', ':'))
+
+def write_tech_trees(merged_data, output_path):
+    """Write the per-faction prerequisite closure index (see techtree.py) as minified JSON"""
+    write_index(build_tech_trees(reference_graph(merged_data)), output_path)
+
 def main():
     # Load All-ODF-Data.json from src folder
     root_dir = Path(__file__).resolve().parent
@@ -163,21 +248,11 @@ def main():
     with open(input_path, 'r') as f:
         all_data = json.load(f)
     
-    # Process each object
-    merged_data = {}
-    for obj_name, obj_data in all_data.items():
-        merged_data[obj_name] = process_inheritance(obj_name, deepcopy(obj_data), all_data)
-    
-    # Process ordnance references
-    process_ordnance_references(merged_data)
-    
-    # Process powerup references
-    process_powerup_references(merged_data)
+    merged_data = merge_odf_data(all_data)
     
     # Write output to merge folder
     output_path = root_dir / 'Divine_ODF_Merge.json'
-    with open(output_path, 'w') as f:
-        json.dump(merged_data, f, indent=4)
+    write_merged(merged_data, output_path)
     
     print(f"\nProcessed {len(merged_data)} ODF objects")
     print(f"Merged data written to: {output_path}")
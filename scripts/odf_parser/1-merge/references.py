@@ -0,0 +1,132 @@
+import re
+from collections import defaultdict, namedtuple
+
+# Reference kinds as (kind, section pattern, key pattern); patterns must match the full name
+REFERENCE_KINDS = [
+    ("ordnance", r"WeaponClass", r"ordName"),
+    ("weapon", r"WeaponPowerupClass", r"weaponName"),
+    ("hardpoint", r"GameObjectClass", r"weaponName\d+"),
+    ("require", r"GameObjectClass", r"requireName\d+"),
+    ("provide", r"GameObjectClass", r"provideName\d+"),
+    ("build", r"ArmoryGroup\d+", r"buildItem\d+"),
+    ("build", r"FactoryClass", r"buildItem\d+"),
+    ("build", r"ConstructionRigClass", r"buildItem\d+"),
+    ("spawn", r"ObjectSpawnClass", r"spawnName"),
+]
+
+Reference = namedtuple("Reference", ["source", "kind", "section", "key", "value", "target"])
+
+def odf_key(value):
+    """Normalize a reference value to a lowercase ODF key, or None if it is empty or NULL"""
+    if not isinstance(value, str):
+        return None
+    value = value.strip().lower()
+    if not value or value == "null":
+        return None
+    if not value.endswith(".odf"):
+        value += ".odf"
+    return value
+
+class ReferenceGraph:
+    """Forward and reverse cross-references between ODF objects
+
+    Built in a single pass over the data. Every reference kind in
+    REFERENCE_KINDS resolves through a lowercase name index, except
+    requireNameN which also resolves to every object that provides the
+    required name (this is how virtual classes such as VIRTUAL_CLASS_ARMORY
+    are satisfied). provideNameN values are indexed as capabilities rather
+    than edges.
+    """
+
+    def __init__(self, data):
+        self.names = {}
+        for name in data:
+            self.names.setdefault(name.lower(), name)
+
+        self.forward = defaultdict(list)
+        self.reverse = defaultdict(list)
+        self.providers = defaultdict(list)
+        self.dangling = []
+
+        patterns = [(kind, re.compile(section), re.compile(key)) for kind, section, key in REFERENCE_KINDS]
+        requires = []
+        for source, odf_data in data.items():
+            for section, class_data in odf_data.items():
+                if not isinstance(class_data, dict):
+                    continue
+                kinds = [(kind, key_re) for kind, section_re, key_re in patterns if section_re.fullmatch(section)]
+                if not kinds:
+                    continue
+                for key, value in class_data.items():
+                    for kind, key_re in kinds:
+                        if not key_re.fullmatch(key):
+                            continue
+                        normalized = odf_key(value)
+                        if normalized is None:
+                            continue
+                        if kind == "provide":
+                            if source not in self.providers[normalized]:
+                                self.providers[normalized].append(source)
+                        elif kind == "require":
+                            # Needs every provider, which may not have been seen yet
+                            requires.append((source, section, key, value, normalized))
+                        else:
+                            self._link(source, kind, section, key, value, self.names.get(normalized))
+
+        for source, section, key, value, normalized in requires:
+            targets = list(self.providers.get(normalized, []))
+            direct = self.names.get(normalized)
+            if direct and direct not in targets:
+                targets.insert(0, direct)
+            if not targets:
+                self._link(source, "require", section, key, value, None)
+            for target in targets:
+                self._link(source, "require", section, key, value, target)
+
+    def _link(self, source, kind, section, key, value, target):
+        reference = Reference(source, kind, section, key, value, target)
+        if target is None:
+            self.dangling.append(reference)
+            return
+        self.forward[source].append(reference)
+        self.reverse[target].append(reference)
+
+    def resolve(self, source, kind):
+        """Return the first target of a given reference kind from source, or None"""
+        for reference in self.forward.get(source, ()):
+            if reference.kind == kind:
+                return reference.target
+        return None
+
+    def targets(self, source, kind=None):
+        """Return the objects referenced by source, optionally of one kind"""
+        return [r.target for r in self.forward.get(source, ()) if kind is None or r.kind == kind]
+
+    def referrers(self, target, kind=None):
+        """Return the objects that reference target, optionally of one kind"""
+        return [r.source for r in self.reverse.get(target, ()) if kind is None or r.kind == kind]
+
+    def report_dangling(self):
+        """Print every unresolved reference, grouped by kind"""
+        if not self.dangling:
+            return
+        grouped = defaultdict(list)
+        for reference in self.dangling:
+            grouped[reference.kind].append(reference)
+        print(f"Warning: {len(self.dangling)} unresolved ODF references")
+        for kind, references in grouped.items():
+            print(f"  {kind} ({len(references)}):")
+            for r in references:
+                print(f"    {r.source} {r.section}.{r.key} = '{r.value}'")
+
+    def to_json(self):
+        """Compact serializable form with [kind, key, object] edges in both directions"""
+        def edges(index, other):
+            return {name: [[r.kind, f"{r.section}.{r.key}", getattr(r, other)] for r in references]
+                    for name, references in index.items()}
+        return {
+            "forward": edges(self.forward, "target"),
+            "reverse": edges(self.reverse, "source"),
+            "providers": dict(self.providers),
+            "dangling": [[r.source, r.kind, f"{r.section}.{r.key}", r.value] for r in self.dangling],
+        }
@@ -0,0 +1,157 @@
+import json
+
+FORMAT = "odf-techtree-1"
+
+# ODF name prefix of each faction's units and buildings; objects with any
+# other prefix (powerups, specials) are shared and join the tree of every
+# faction that can meet their requirements
+FACTIONS = {"i": "ISDF", "f": "Scion", "e": "Hadean"}
+
+def bits(bitset):
+    """Yield the set bit positions of an int bitset, lowest first"""
+    while bitset:
+        low = bitset & -bitset
+        yield low.bit_length() - 1
+        bitset ^= low
+
+class TechTree:
+    """Prerequisite closure of one faction's build graph, as int bitsets
+
+    A requirement (a requireNameN value such as "ibfact" or
+    "VIRTUAL_CLASS_FACTORY") is a token, satisfied by any of the faction's
+    objects that provide it or by the ODF of the same name. requires[x] is
+    the bitset of every token that must be available before x can be
+    built: the tokens x names directly plus, for each, what all of its
+    providers have in common. unlocks[x] is the bitset of objects whose
+    requirements include a token x provides.
+    """
+
+    def __init__(self, faction, objects, requirements, providers):
+        self.faction = faction
+        self.objects = objects
+        self.object_ids = {name: i for i, name in enumerate(objects)}
+        self.tokens = sorted({token for names in requirements.values() for token in names} | set(providers))
+        self.token_ids = {token: i for i, token in enumerate(self.tokens)}
+        self.providers = [[self.object_ids[name] for name in providers.get(token, [])] for token in self.tokens]
+        self.direct = [[self.token_ids[token] for token in requirements.get(name, [])] for name in objects]
+        self.unsatisfied = {name: [token for token in requirements.get(name, []) if not providers.get(token)]
+                            for name in objects}
+        self.unsatisfied = {name: tokens for name, tokens in self.unsatisfied.items() if tokens}
+
+        self.requires = self.close()
+        self.token_requires = [self.token_closure(t, self.requires) for t in range(len(self.tokens))]
+        self.depth = [bin(bitset).count("1") for bitset in self.token_requires]
+
+        users = [0] * len(self.tokens)
+        for x, bitset in enumerate(self.requires):
+            for t in bits(bitset):
+                users[t] |= 1 << x
+        provides = [0] * len(objects)
+        for t, provider_ids in enumerate(self.providers):
+            for x in provider_ids:
+                provides[x] |= 1 << t
+        self.unlocks = []
+        for x in range(len(objects)):
+            bitset = 0
+            for t in bits(provides[x]):
+                bitset |= users[t]
+            self.unlocks.append(bitset)
+
+    def token_closure(self, t, requires):
+        """Tokens needed before any provider of t can be built: what they all require"""
+        common = None
+        for x in self.providers[t]:
+            common = requires[x] if common is None else common & requires[x]
+        return common or 0
+
+    def close(self):
+        """Compute requires[] as the least fixpoint, so cyclic requirements still settle"""
+        requires = [0] * len(self.objects)
+        changed = True
+        while changed:
+            changed = False
+            for x, direct in enumerate(self.direct):
+                bitset = 0
+                for t in direct:
+                    bitset |= (1 << t) | self.token_closure(t, requires)
+                if bitset != requires[x]:
+                    requires[x] = bitset
+                    changed = True
+        return requires
+
+    def prerequisites(self, name):
+        """Every requirement token that must be met before building name"""
+        return [self.tokens[t] for t in bits(self.requires[self.object_ids[name]])]
+
+    def build_order(self, name):
+        """Prerequisite tokens of name in an order they can be met, fewest prerequisites first
+
+        A token's own prerequisites are a strict subset of the prerequisites
+        of anything that needs it, so sorting by their count is a
+        topological order.
+        """
+        tokens = sorted(bits(self.requires[self.object_ids[name]]), key=lambda t: (self.depth[t], self.tokens[t]))
+        return [self.tokens[t] for t in tokens]
+
+    def unlocked_by(self, name):
+        """Objects that need something name provides"""
+        return [self.objects[x] for x in bits(self.unlocks[self.object_ids[name]])]
+
+    def to_json(self):
+        """Compact index: bitsets as hex strings, build orders as token ids"""
+        return {
+            "tokens": self.tokens,
+            "providers": self.providers,
+            "objects": self.objects,
+            "requires": [format(bitset, "x") for bitset in self.requires],
+            "unlocks": [format(bitset, "x") for bitset in self.unlocks],
+            "buildOrder": [sorted(bits(bitset), key=lambda t: (self.depth[t], self.tokens[t]))
+                           for bitset in self.requires],
+            "unsatisfied": self.unsatisfied,
+        }
+
+def build_tech_trees(graph):
+    """Build a TechTree per faction from the require/provide references in graph"""
+    requirements = {}
+    for source, references in graph.forward.items():
+        tokens = []
+        for reference in references:
+            token = reference.value.strip().lower()
+            if reference.kind == "require" and token not in tokens:
+                tokens.append(token)
+        if tokens:
+            requirements[source] = tokens
+    for reference in graph.dangling:
+        if reference.kind == "require":
+            tokens = requirements.setdefault(reference.source, [])
+            token = reference.value.strip().lower()
+            if token not in tokens:
+                tokens.append(token)
+
+    # graph.providers is keyed like ODF names ("ibfact.odf"); a token is the bare name
+    provided = {key[:-len(".odf")]: sources for key, sources in graph.providers.items()}
+
+    trees = {}
+    for prefix, faction in FACTIONS.items():
+        providers = {}
+        for token, sources in provided.items():
+            providers[token] = [name for name in sources if name.startswith(prefix)]
+        for token in {token for tokens in requirements.values() for token in tokens}:
+            direct = graph.names.get(f"{token}.odf")
+            if direct and direct.startswith(prefix) and direct not in providers.setdefault(token, []):
+                providers[token].insert(0, direct)
+        providers = {token: names for token, names in providers.items() if names}
+
+        objects = {name for name in requirements if name.startswith(prefix)}
+        objects |= {name for name, tokens in requirements.items()
+                    if name[0] not in FACTIONS and all(token in providers for token in tokens)}
+        objects = sorted(objects | {name for names in providers.values() for name in names})
+        trees[faction] = TechTree(faction, objects, {name: requirements.get(name, []) for name in objects},
+                                  providers)
+    return trees
+
+def write_index(trees, output_path):
+    """Write every faction's index as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump({"format": FORMAT, "factions": {faction: tree.to_json() for faction, tree in trees.items()}},
+                  f, separators=(',', ':'))
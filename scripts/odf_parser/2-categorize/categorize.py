@@ -1,4 +1,6 @@
+import hashlib
 import json
+import statistics
 from pathlib import Path
 
 # Define the categories and their identifying class keys
@@ -35,6 +37,89 @@ def categorize_objects(data):
     
     return categorized
 
+def write_categorized(categorized_data, output_path, minified=False):
+    """Write categorized data as pretty or minified JSON"""
+    with open(output_path, 'w') as f:
+        if minified:
+            json.dump(categorized_data, f, separators=(',', ':'))
+        else:
+            json.dump(categorized_data, f, indent=4)
+
+def content_hash(text):
+    """Short content hash used in manifests to detect changed files"""
+    return hashlib.sha256(text.encode()).hexdigest()[:16]
+
+def display_name(odf_data):
+    """Return the in-game name of an object, falling back to the weapon name"""
+    name = odf_data.get('GameObjectClass', {}).get('unitName')
+    if not name:
+        name = odf_data.get('WeaponClass', {}).get('wpnName')
+    return name
+
+def write_shards(categorized_data, output_dir):
+    """Write per-category and per-object shards plus a manifest.json
+    
+    Every shard is listed in the manifest with its path (relative to
+    output_dir) and a content hash, so a client can fetch only what it
+    shows and caches stay valid for shards that did not change. Shards
+    left over from objects that no longer exist are removed.
+    Returns the manifest.
+    """
+    output_dir = Path(output_dir)
+    manifest = {"categories": {}, "objects": {}}
+    written = set()
+
+    def write(relative_path, data):
+        text = json.dumps(data, separators=(',', ':'))
+        path = output_dir / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+        written.add(path)
+        return {"shard": relative_path, "hash": content_hash(text), "bytes": len(text.encode())}
+
+    for category, objects in categorized_data.items():
+        entry = write(f"{category.lower()}.min.json", objects)
+        entry["count"] = len(objects)
+        manifest["categories"][category] = entry
+
+        for odf_name, odf_data in objects.items():
+            entry = write(f"{category.lower()}/{odf_name}.json", odf_data)
+            entry["category"] = category
+            entry["unitName"] = display_name(odf_data)
+            manifest["objects"][odf_name] = entry
+
+    for stale in output_dir.glob('**/*.json'):
+        if stale not in written and stale.name != 'manifest.json':
+            stale.unlink()
+
+    with open(output_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f, separators=(',', ':'))
+
+    return manifest
+
+def print_shard_summary(manifest):
+    """Print shard counts, total bytes and the object shard size distribution"""
+    category_sizes = [entry["bytes"] for entry in manifest["categories"].values()]
+    object_sizes = sorted(entry["bytes"] for entry in manifest["objects"].values())
+    print("\nShard summary:")
+    print("-" * 30)
+    print(f"Category shards: {len(category_sizes)}, {sum(category_sizes)} bytes")
+    print(f"Object shards: {len(object_sizes)}, {sum(object_sizes)} bytes")
+    if len(object_sizes) > 1:
+        deciles = statistics.quantiles(object_sizes, n=10)
+        print(f"Object shard bytes: min {object_sizes[0]}, median {statistics.median(object_sizes):.0f}, "
+              f"p90 {deciles[-1]:.0f}, max {object_sizes[-1]}")
+    print("-" * 30)
+
+def print_summary(categorized_data):
+    """Print object counts per category"""
+    print("\nCategorized objects summary:")
+    print("-" * 30)
+    for category, objects in categorized_data.items():
+        print(f"{category}: {len(objects)} objects")
+    print("-" * 30)
+
 def main():
     # Load Divine_ODF_Merge.json from src folder
     root_dir = Path(__file__).resolve().parent
@@ -48,20 +133,14 @@ def main():
     
     # Write pretty output
     output_path = root_dir / 'Categorized-ODF-Data.json'
-    with open(output_path, 'w') as f:
-        json.dump(categorized_data, f, indent=4)
+    write_categorized(categorized_data, output_path)
     
     # Write minified output
     minified_path = root_dir / 'odf.min.json'
-    with open(minified_path, 'w') as f:
-        json.dump(categorized_data, f, separators=(',', ':'))
+    write_categorized(categorized_data, minified_path, minified=True)
     
     # Print summary
-    print("\nCategorized objects summary:")
-    print("-" * 30)
-    for category, objects in categorized_data.items():
-        print(f"{category}: {len(objects)} objects")
-    print("-" * 30)
+    print_summary(categorized_data)
     print(f"\nOutput written to:")
     print(f"Pretty: {output_path}")
     print(f"Minified: {minified_path}")
@@ -0,0 +1,120 @@
+import json
+
+FORMAT = "odf-columnar-1"
+
+class ValueTable:
+    """Interns JSON values so each distinct value is stored once"""
+
+    def __init__(self):
+        self.values = []
+        self.ids = {}
+
+    def intern(self, value):
+        # json.dumps keeps "1", 1 and 1.0 apart
+        token = json.dumps(value, separators=(',', ':'))
+        if token not in self.ids:
+            self.ids[token] = len(self.values)
+            self.values.append(value)
+        return self.ids[token]
+
+def encode(categorized_data):
+    """Encode categorized ODF data column-wise with interned keys and values
+
+    Each class section is stored once for the whole dataset: the objects
+    that have it (rows), its key names, one column of value ids per key
+    (-1 where a row lacks the key) and the key order of each row. Top-level
+    non-section entries such as inheritanceChain are stored the same way in
+    "scalars". Category, object, section and key order are all preserved,
+    so decode() returns data that serializes identically.
+    """
+    table = ValueTable()
+    categories = []
+    layouts, layout_ids = [], {}
+    object_layouts = []
+    sections = {}
+    scalars = {}
+
+    row = 0
+    for category, objects in categorized_data.items():
+        categories.append([category, [table.intern(odf_name) for odf_name in objects]])
+        for odf_data in objects.values():
+            layout = tuple(odf_data)
+            if layout not in layout_ids:
+                layout_ids[layout] = len(layouts)
+                layouts.append(list(layout))
+            object_layouts.append(layout_ids[layout])
+
+            for name, value in odf_data.items():
+                if isinstance(value, dict):
+                    if name in scalars:
+                        raise ValueError(f"'{name}' is both a section and a scalar entry")
+                    section = sections.setdefault(name, {"rows": [], "keys": {}, "columns": [],
+                                                         "shapes": {}, "rowShapes": []})
+                    shape = []
+                    for key in value:
+                        if key not in section["keys"]:
+                            section["keys"][key] = len(section["columns"])
+                            section["columns"].append([-1] * len(section["rows"]))
+                        shape.append(section["keys"][key])
+                    for column in section["columns"]:
+                        column.append(-1)
+                    for key, item in value.items():
+                        section["columns"][section["keys"][key]][-1] = table.intern(item)
+                    section["rows"].append(row)
+                    section["rowShapes"].append(section["shapes"].setdefault(tuple(shape), len(section["shapes"])))
+                else:
+                    if name in sections:
+                        raise ValueError(f"'{name}' is both a section and a scalar entry")
+                    scalar = scalars.setdefault(name, {"rows": [], "values": []})
+                    scalar["rows"].append(row)
+                    scalar["values"].append(table.intern(value))
+            row += 1
+
+    return {
+        "format": FORMAT,
+        "table": table.values,
+        "categories": categories,
+        "layouts": layouts,
+        "objects": object_layouts,
+        "sections": {
+            name: {
+                "rows": section["rows"],
+                "keys": list(section["keys"]),
+                "columns": section["columns"],
+                "shapes": [list(shape) for shape in section["shapes"]],
+                "rowShapes": section["rowShapes"],
+            }
+            for name, section in sections.items()
+        },
+        "scalars": scalars,
+    }
+
+def decode(encoded):
+    """Reference decoder for encode(); table values are shared, not copied"""
+    if encoded.get("format") != FORMAT:
+        raise ValueError(f"Unsupported compact ODF format: {encoded.get('format')}")
+    table = encoded["table"]
+
+    # Rebuild every section row column-wise, then hand rows out in object order
+    pending = {}
+    for name, section in encoded["sections"].items():
+        keys, columns, shapes = section["keys"], section["columns"], section["shapes"]
+        dicts = [{keys[c]: table[columns[c][r]] for c in shapes[shape]}
+                 for r, shape in enumerate(section["rowShapes"])]
+        pending[name] = iter(dicts)
+    for name, scalar in encoded["scalars"].items():
+        pending[name] = iter([table[v] for v in scalar["values"]])
+
+    layouts = encoded["layouts"]
+    object_layouts = iter(encoded["objects"])
+    categorized_data = {}
+    for category, names in encoded["categories"]:
+        objects = categorized_data[category] = {}
+        for name_id in names:
+            objects[table[name_id]] = {name: next(pending[name]) for name in layouts[next(object_layouts)]}
+    return categorized_data
+
+def write_compact(categorized_data, output_path):
+    """Write the columnar encoding as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(encode(categorized_data), f, separators=(',', ':'))
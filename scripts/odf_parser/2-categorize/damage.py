@@ -0,0 +1,189 @@
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Value parsing shared with the other stages lives next to Parse-ODF-Data.py
+if str(Path(__file__).resolve().parent.parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from odf_values import to_number
+
+FORMAT = "odf-damage-1"
+
+# Damage classes in the order of OrdnanceClass damageValue(X) keys: armor
+# (None, Light, Heavy) then shields (Standard, Deflection, Absorption)
+DAMAGE_CLASSES = ["N", "L", "H", "S", "D", "A"]
+DEFAULT_ARMOR = "N"
+TARGET_CATEGORIES = ["Vehicle", "Building"]
+
+def find_ordnance(odf_data, categorized_data):
+    """Return a weapon's OrdnanceClass, embedded or linked in normalized data"""
+    if 'Ordnance.OrdnanceClass' in odf_data:
+        return odf_data['Ordnance.OrdnanceClass']
+    ordnance_name = odf_data.get('links', {}).get('Ordnance')
+    if ordnance_name:
+        return categorized_data.get('Ordnance', {}).get(ordnance_name, {}).get('OrdnanceClass')
+    return None
+
+def fire_rate(odf_data):
+    """Shots per second of a weapon, or None when it has no shotDelay
+
+    A weapon fires salvoCount shots salvoDelay apart, then waits shotDelay
+    before the next salvo. Charge guns are rated at their first level.
+    """
+    for section, class_data in odf_data.items():
+        if section == 'WeaponClass' or '.' in section or not isinstance(class_data, dict):
+            continue
+        suffix = '1' if 'shotDelay1' in class_data else ''
+        shot_delay = to_number(class_data.get(f'shotDelay{suffix}'))
+        if shot_delay is None:
+            continue
+        salvo_count = to_number(class_data.get(f'salvoCount{suffix}')) or 1.0
+        salvo_delay = to_number(class_data.get(f'salvoDelay{suffix}')) or 0.0
+        cycle = shot_delay + (salvo_count - 1) * salvo_delay
+        return salvo_count / cycle if cycle > 0 else None
+    return None
+
+def weapon_row(odf_data, categorized_data):
+    """(damage per shot by damage class, shots per second) for a weapon, or None if it deals no direct damage"""
+    ordnance = find_ordnance(odf_data, categorized_data)
+    rate = fire_rate(odf_data)
+    if not ordnance or rate is None:
+        return None
+    damage = [to_number(ordnance.get(f'damageValue({c})')) or 0.0 for c in DAMAGE_CLASSES]
+    if not any(damage):
+        return None
+    return damage, rate
+
+def target_column(odf_data):
+    """(max health, damage class index) for a vehicle or building, or None without maxHealth"""
+    game_object = odf_data.get('GameObjectClass', {})
+    health = to_number(game_object.get('maxHealth'))
+    if not health:
+        return None
+    armor = str(game_object.get('armorClass') or DEFAULT_ARMOR).strip().upper()[:1]
+    if armor not in DAMAGE_CLASSES:
+        armor = DEFAULT_ARMOR
+    return health, DAMAGE_CLASSES.index(armor)
+
+class DamageMatrix:
+    """Dense DPS and time-to-kill matrices of every weapon against every vehicle and building
+
+    Weapons are rows and targets columns. Per-weapon damage (by damage
+    class) and fire rate, and per-target health and armor, are kept as
+    arrays, so dps and ttk are a gather and a broadcast divide. update()
+    recomputes only the rows and columns of ODFs that changed.
+    """
+
+    def __init__(self, categorized_data):
+        self.weapons, self.targets = [], []
+        self.damage = np.zeros((0, len(DAMAGE_CLASSES)))
+        self.rate = np.zeros(0)
+        self.health = np.zeros(0)
+        self.armor = np.zeros(0, dtype=np.intp)
+        self.ordnance_users = {}
+        self.update(categorized_data)
+
+    def update(self, categorized_data, changed=None):
+        """Recompute weapons and targets from categorized_data
+
+        changed lists the ODF names to refresh; None refreshes everything.
+        A changed ordnance refreshes the weapons that use it, names no
+        longer in the data are dropped and new ones are appended.
+        """
+        weapons = categorized_data.get('Weapon', {})
+        targets = {odf_name: odf_data for category in TARGET_CATEGORIES
+                   for odf_name, odf_data in categorized_data.get(category, {}).items()}
+        if changed is None:
+            changed = set(weapons) | set(targets) | set(self.weapons) | set(self.targets)
+        else:
+            changed = set(changed)
+            for odf_name in list(changed):
+                changed |= self.ordnance_users.get(odf_name, set())
+
+        rows = {odf_name: weapon_row(weapons[odf_name], categorized_data) if odf_name in weapons else None
+                for odf_name in changed}
+        columns = {odf_name: target_column(targets[odf_name]) if odf_name in targets else None
+                   for odf_name in changed}
+
+        self.weapons, (self.damage, self.rate) = self.apply(
+            self.weapons, (self.damage, self.rate), {name: row for name, row in rows.items()
+                                                     if name in weapons or name in self.weapons})
+        self.targets, (self.health, self.armor) = self.apply(
+            self.targets, (self.health, self.armor), {name: column for name, column in columns.items()
+                                                      if name in targets or name in self.targets})
+
+        for odf_name in changed:
+            for users in self.ordnance_users.values():
+                users.discard(odf_name)
+            if odf_name in weapons:
+                ordnance_name = weapons[odf_name].get('links', {}).get('Ordnance')
+                if ordnance_name:
+                    self.ordnance_users.setdefault(ordnance_name, set()).add(odf_name)
+
+    @staticmethod
+    def apply(names, arrays, updates):
+        """Overwrite, drop or append entries of parallel arrays; an update of None drops the entry"""
+        index = {name: i for i, name in enumerate(names)}
+        keep = np.ones(len(names), dtype=bool)
+        appended = []
+        for name, values in updates.items():
+            if name in index:
+                if values is None:
+                    keep[index[name]] = False
+                else:
+                    for array, value in zip(arrays, values):
+                        array[index[name]] = value
+            elif values is not None:
+                appended.append((name, values))
+
+        names = [name for name, kept in zip(names, keep) if kept] + [name for name, _ in appended]
+        arrays = tuple(
+            np.concatenate([array[keep], np.array([values[i] for _, values in appended], dtype=array.dtype)
+                            .reshape((-1,) + array.shape[1:])])
+            for i, array in enumerate(arrays)
+        )
+        return names, arrays
+
+    def dps_by_class(self):
+        """Damage per second of each weapon against each damage class"""
+        return self.damage * self.rate[:, None]
+
+    def dps(self):
+        """Damage per second of each weapon (rows) against each target (columns)"""
+        return self.dps_by_class()[:, self.armor]
+
+    def ttk(self):
+        """Seconds for each weapon to kill each target from full health; inf when it cannot"""
+        dps = self.dps()
+        with np.errstate(divide='ignore'):
+            return np.where(dps > 0, self.health[None, :] / dps, np.inf)
+
+def write_tables(matrix, output_path):
+    """Write the precomputed tables for the site as minified JSON
+
+    dpsByClass is weapons x damage classes; ttk is weapons x targets in
+    tenths of a second, with null where the weapon cannot damage the
+    target. A target's dps is dpsByClass at its armor class index.
+    """
+    ttk = np.round(matrix.ttk() * 10)
+    tables = {
+        "format": FORMAT,
+        "damageClasses": DAMAGE_CLASSES,
+        "weapons": matrix.weapons,
+        "targets": matrix.targets,
+        "health": matrix.health.tolist(),
+        "armor": matrix.armor.tolist(),
+        "dpsByClass": np.round(matrix.dps_by_class(), 2).tolist(),
+        "ttk": [[int(v) if math.isfinite(v) else None for v in row] for row in ttk.tolist()],
+    }
+    with open(output_path, 'w') as f:
+        json.dump(tables, f, separators=(',', ':'))
+
+def print_damage_summary(matrix):
+    """Print matrix size and how many weapon/target pairs can kill"""
+    killable = int(np.isfinite(matrix.ttk()).sum())
+    print(f"\nDamage matrix: {len(matrix.weapons)} weapons x {len(matrix.targets)} targets, "
+          f"{killable} pairs with a finite time to kill")
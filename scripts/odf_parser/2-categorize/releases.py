@@ -0,0 +1,237 @@
+import json
+from pathlib import Path
+
+from categorize import content_hash, display_name
+
+FORMAT = "odf-release-delta-1"
+
+def object_hashes(categorized_data):
+    """Hash every object together with its category, independent of key order"""
+    return {
+        odf_name: content_hash(json.dumps([category, odf_data], sort_keys=True, separators=(',', ':')))
+        for category, objects in categorized_data.items()
+        for odf_name, odf_data in objects.items()
+    }
+
+def release_version(hashes):
+    """Version id of a release: a hash over its object hashes, so reordering alone is not a release"""
+    return content_hash(json.dumps(hashes, sort_keys=True, separators=(',', ':')))
+
+def index_objects(categorized_data):
+    """Map each ODF name to (category, object data)"""
+    return {odf_name: (category, odf_data)
+            for category, objects in categorized_data.items()
+            for odf_name, odf_data in objects.items()}
+
+def diff_sections(old, new):
+    """Describe the changes from old to new object data
+
+    "set" holds changed keys per section (a section missing from old is
+    set whole), "unset" the keys removed from a section and "drop" the
+    sections removed entirely. Non-section entries such as
+    inheritanceChain are set whole.
+    """
+    entry = {"set": {}, "unset": {}, "drop": [name for name in old if name not in new]}
+    for name, value in new.items():
+        old_value = old.get(name)
+        if value == old_value:
+            continue
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            entry["set"][name] = {key: item for key, item in value.items()
+                                  if key not in old_value or old_value[key] != item}
+            gone = [key for key in old_value if key not in value]
+            if gone:
+                entry["unset"][name] = gone
+            if not entry["set"][name]:
+                del entry["set"][name]
+        else:
+            entry["set"][name] = value
+    return {field: content for field, content in entry.items() if content}
+
+def diff_release(previous, current, previous_hashes=None, current_hashes=None):
+    """Build the delta that patches the previous release's data into the current one
+
+    Objects whose hashes match are skipped without being compared, and
+    changed objects carry only their changed keys. Every touched object
+    lists its new hash so a client can check what it patched.
+    """
+    previous_hashes = previous_hashes or object_hashes(previous)
+    current_hashes = current_hashes or object_hashes(current)
+    previous_index = index_objects(previous)
+
+    added, changed = {}, {}
+    for odf_name, (category, odf_data) in index_objects(current).items():
+        if odf_name not in previous_index:
+            added[odf_name] = {"category": category, "object": odf_data, "hash": current_hashes[odf_name]}
+        elif previous_hashes.get(odf_name) != current_hashes[odf_name]:
+            old_category, old_data = previous_index[odf_name]
+            entry = diff_sections(old_data, odf_data)
+            if category != old_category:
+                entry["category"] = category
+            entry["hash"] = current_hashes[odf_name]
+            changed[odf_name] = entry
+    removed = [odf_name for odf_name in previous_index if odf_name not in current_hashes]
+
+    return {"format": FORMAT, "added": added, "removed": removed, "changed": changed}
+
+def apply_release_delta(categorized_data, delta):
+    """Patch a release's categorized data forward with a diff_release() delta
+
+    The result compares equal to the newer release; objects that moved or
+    were added are appended to their category, so key order can differ.
+    """
+    if delta.get("format") != FORMAT:
+        raise ValueError(f"Unsupported ODF release delta format: {delta.get('format')}")
+    patched = {category: dict(objects) for category, objects in categorized_data.items()}
+    index = index_objects(categorized_data)
+
+    for odf_name in delta["removed"]:
+        del patched[index[odf_name][0]][odf_name]
+    for odf_name, entry in delta["changed"].items():
+        category, odf_data = index[odf_name]
+        odf_data = {name: value for name, value in odf_data.items() if name not in entry.get("drop", [])}
+        for name, keys in entry.get("unset", {}).items():
+            odf_data[name] = {key: item for key, item in odf_data[name].items() if key not in keys}
+        for name, value in entry.get("set", {}).items():
+            if isinstance(value, dict) and isinstance(odf_data.get(name), dict):
+                odf_data[name] = {**odf_data[name], **value}
+            else:
+                odf_data[name] = value
+        if "category" in entry:
+            del patched[category][odf_name]
+            category = entry["category"]
+        patched.setdefault(category, {})[odf_name] = odf_data
+    for odf_name, entry in delta["added"].items():
+        patched.setdefault(entry["category"], {})[odf_name] = entry["object"]
+    return patched
+
+def format_value(value):
+    return json.dumps(value) if not isinstance(value, str) else value
+
+def write_patch_notes(previous, current, delta, output_path, title):
+    """Write a Markdown change list with old and new values for every changed key"""
+    previous_index = index_objects(previous)
+    current_index = index_objects(current)
+
+    def label(odf_name, odf_data):
+        name = display_name(odf_data)
+        return f"{name} ({odf_name})" if name else odf_name
+
+    lines = [f"# {title}", ""]
+    for heading, names, index in (("Added", delta["added"], current_index),
+                                  ("Removed", delta["removed"], previous_index)):
+        if names:
+            lines += [f"## {heading} ({len(names)})", ""]
+            lines += [f"- {index[odf_name][0]}: {label(odf_name, index[odf_name][1])}" for odf_name in names]
+            lines.append("")
+
+    if delta["changed"]:
+        lines += [f"## Changed ({len(delta['changed'])})", ""]
+        for odf_name, entry in delta["changed"].items():
+            old_category, old_data = previous_index[odf_name]
+            category, odf_data = current_index[odf_name]
+            lines += [f"### {category}: {label(odf_name, odf_data)}", ""]
+            if "category" in entry:
+                lines.append(f"- moved from {old_category}")
+            for name in entry.get("drop", []):
+                lines.append(f"- `{name}` removed")
+            for name, keys in entry.get("unset", {}).items():
+                lines += [f"- `{name}.{key}` removed (was {format_value(old_data[name][key])})" for key in keys]
+            for name, value in entry.get("set", {}).items():
+                old_value = old_data.get(name)
+                if isinstance(value, dict) and isinstance(old_value, dict):
+                    for key, item in value.items():
+                        if key in old_value:
+                            lines.append(f"- `{name}.{key}`: {format_value(old_value[key])} → {format_value(item)}")
+                        else:
+                            lines.append(f"- `{name}.{key}` added: {format_value(item)}")
+                elif name in old_data:
+                    lines.append(f"- `{name}`: {format_value(old_value)} → {format_value(value)}")
+                else:
+                    lines.append(f"- `{name}` added")
+            lines.append("")
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("\n".join(lines))
+
+def publish_release(categorized_data, publish_dir, keep=10):
+    """Publish categorized data as a new release with a delta from the previous one
+
+    publish_dir holds the site files: odf.min.json (the latest release),
+    hashes.min.json (its per-object hashes), versions.json and, under
+    releases/, a delta and Markdown patch notes for each of the last keep
+    releases. A version is a hash over its object hashes, so a
+    client on an older version follows "previous" links in versions.json
+    and applies the deltas in turn instead of fetching the full file.
+    Returns the versions manifest.
+    """
+    publish_dir = Path(publish_dir)
+    data_path = publish_dir / 'odf.min.json'
+    hashes_path = publish_dir / 'hashes.min.json'
+    versions_path = publish_dir / 'versions.json'
+    releases_dir = publish_dir / 'releases'
+
+    current_hashes = object_hashes(categorized_data)
+    version = release_version(current_hashes)
+    versions = {"latest": None, "releases": []}
+    if versions_path.exists():
+        with open(versions_path, 'r') as f:
+            versions = json.load(f)
+    if versions["latest"] == version:
+        print(f"Release {version} is already published")
+        return versions
+
+    text = json.dumps(categorized_data, separators=(',', ':'))
+    entry = {"version": version, "previous": None, "objects": len(current_hashes), "bytes": len(text.encode())}
+
+    # The published odf.min.json is the previous release, whether or not it
+    # was published by this function; if it already holds this data, this
+    # is the first release and has no delta
+    previous, previous_version = None, None
+    if data_path.exists():
+        with open(data_path, 'r') as f:
+            previous = json.load(f)
+        previous_hashes = object_hashes(previous)
+        previous_version = release_version(previous_hashes)
+
+    if previous is not None and previous_version != version:
+        delta = diff_release(previous, categorized_data, previous_hashes, current_hashes)
+        delta["from"], delta["to"] = previous_version, version
+        releases_dir.mkdir(parents=True, exist_ok=True)
+        stem = f"{previous_version}-{version}"
+        delta_text = json.dumps(delta, separators=(',', ':'))
+        (releases_dir / f"{stem}.json").write_text(delta_text)
+        write_patch_notes(previous, categorized_data, delta, releases_dir / f"{stem}.md",
+                          f"ODF data {previous_version} → {version}")
+        entry.update({
+            "previous": previous_version,
+            "delta": f"releases/{stem}.json",
+            "deltaBytes": len(delta_text.encode()),
+            "notes": f"releases/{stem}.md",
+            "added": len(delta["added"]),
+            "removed": len(delta["removed"]),
+            "changed": len(delta["changed"]),
+        })
+
+    versions["releases"].append(entry)
+    for stale in versions["releases"][:-keep]:
+        for field in ("delta", "notes"):
+            if stale.get(field):
+                (publish_dir / stale[field]).unlink(missing_ok=True)
+                stale[field] = None
+    versions["latest"] = version
+
+    data_path.write_text(text)
+    with open(hashes_path, 'w') as f:
+        json.dump(current_hashes, f, separators=(',', ':'))
+    with open(versions_path, 'w') as f:
+        json.dump(versions, f, indent=4)
+    return versions
+
+def print_release_summary(versions):
+    entry = versions["releases"][-1]
+    print(f"\nLatest ODF release: {entry['version']}")
+    if entry["previous"]:
+        print(f"  - from {entry['previous']}: {entry['added']} added, {entry['removed']} removed, "
+              f"{entry['changed']} changed")
+        print(f"  - delta {entry['deltaBytes']} bytes vs {entry['bytes']} bytes full")
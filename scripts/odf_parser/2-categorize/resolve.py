@@ -0,0 +1,34 @@
+def build_index(categorized_data):
+    """Flatten categorized data into a single ODF name -> object index"""
+    index = {}
+    for objects in categorized_data.values():
+        index.update(objects)
+    return index
+
+def expand_object(odf_name, index):
+    """Return an object from normalized data in the embedded Ordnance.* / Powerup.* form"""
+    odf_data = index[odf_name]
+    links = odf_data.get('links')
+    if not links:
+        return odf_data
+
+    expanded = {k: v for k, v in odf_data.items() if k != 'links'}
+
+    ordnance_name = links.get('Ordnance')
+    if ordnance_name in index:
+        for class_name, class_data in expand_object(ordnance_name, index).items():
+            expanded[f"Ordnance.{class_name}"] = class_data
+
+    for powerup_name in links.get('Powerup', []):
+        if powerup_name not in index:
+            continue
+        for class_name, class_data in expand_object(powerup_name, index).items():
+            expanded[f"Powerup.{class_name}"] = class_data
+
+    return expanded
+
+def expand(categorized_data):
+    """Expand a whole normalized categorized dataset into the embedded form"""
+    index = build_index(categorized_data)
+    return {category: {odf_name: expand_object(odf_name, index) for odf_name in objects}
+            for category, objects in categorized_data.items()}
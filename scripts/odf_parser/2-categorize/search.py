@@ -0,0 +1,157 @@
+import json
+import re
+from bisect import bisect_left
+
+FORMAT = "odf-search-1"
+
+# Searchable fields as (name, weight); a posting's low bits flag the fields a term came from
+FIELDS = [
+    ("unitName", 4),
+    ("wpnName", 4),
+    ("file", 3),
+    ("classLabel", 1),
+    ("inheritanceChain", 1),
+]
+FIELD_BITS = len(FIELDS)
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """Lowercase text and split it into alphanumeric tokens, plus the whole value when it has several"""
+    text = text.lower().strip()
+    tokens = TOKEN_PATTERN.findall(text)
+    if len(tokens) > 1:
+        tokens.append(text)
+    return tokens
+
+def field_values(odf_name, odf_data):
+    """Yield (field index, text) for every searchable value of an object"""
+    game_object = odf_data.get("GameObjectClass", {})
+    weapon = odf_data.get("WeaponClass", {})
+    values = {
+        "unitName": [game_object.get("unitName")],
+        "wpnName": [weapon.get("wpnName")],
+        "file": [odf_name[:-len(".odf")] if odf_name.endswith(".odf") else odf_name],
+        # Embedded Ordnance.* / Powerup.* sections belong to other objects
+        "classLabel": [class_data.get("classLabel") for section, class_data in odf_data.items()
+                       if isinstance(class_data, dict) and "." not in section],
+        "inheritanceChain": odf_data.get("inheritanceChain", []),
+    }
+    for field, (name, _) in enumerate(FIELDS):
+        for value in values[name]:
+            if isinstance(value, str) and value:
+                yield field, value
+
+def build_index(categorized_data):
+    """Build the inverted index over every object in categorized_data
+
+    Documents are numbered in category order. Each term has a posting list
+    of doc << FIELD_BITS | field mask, ascending and delta-encoded so it
+    stays a short array of small integers. Terms are stored sorted, so a
+    prefix query is a binary search for the range of terms it starts.
+    """
+    categories = list(categorized_data)
+    docs = []
+    postings = {}
+    for category_id, (category, objects) in enumerate(categorized_data.items()):
+        for odf_name, odf_data in objects.items():
+            doc = len(docs)
+            docs.append([category_id, odf_name])
+            masks = {}
+            for field, value in field_values(odf_name, odf_data):
+                for term in tokenize(value):
+                    masks[term] = masks.get(term, 0) | (1 << field)
+            for term, mask in masks.items():
+                postings.setdefault(term, []).append(doc << FIELD_BITS | mask)
+
+    terms = sorted(postings)
+    encoded = []
+    for term in terms:
+        previous = 0
+        deltas = []
+        for posting in postings[term]:
+            deltas.append(posting - previous)
+            previous = posting
+        encoded.append(deltas)
+    return {
+        "format": FORMAT,
+        "fields": [name for name, _ in FIELDS],
+        "categories": categories,
+        "docs": docs,
+        "terms": terms,
+        "postings": encoded,
+    }
+
+def write_index(categorized_data, output_path):
+    """Write the search index as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(build_index(categorized_data), f, separators=(',', ':'))
+
+class SearchIndex:
+    """Query API over a built index, mirroring what the site does with the JSON
+
+    Every query token must match (as a whole term or a term prefix). A
+    match scores the weight of the best field it was found in, doubled
+    for a whole-term match; a query equal to a full name scores a bonus.
+    Ties go to the shorter name, then document order.
+    """
+
+    def __init__(self, index):
+        if index.get("format") != FORMAT:
+            raise ValueError(f"Unsupported ODF search index format: {index.get('format')}")
+        self.index = index
+        self.terms = index["terms"]
+        self.weights = [weight for _, weight in FIELDS]
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def postings(self, term_id):
+        """Decode one posting list into (doc, field mask) pairs"""
+        posting = 0
+        for delta in self.index["postings"][term_id]:
+            posting += delta
+            yield posting >> FIELD_BITS, posting & ((1 << FIELD_BITS) - 1)
+
+    def field_score(self, mask):
+        return max(weight for field, weight in enumerate(self.weights) if mask & (1 << field))
+
+    def match(self, token, prefix=True):
+        """Score every document matching one token, exactly or by prefix"""
+        scores = {}
+        start = bisect_left(self.terms, token)
+        end = start
+        while end < len(self.terms) and self.terms[end].startswith(token):
+            exact = self.terms[end] == token
+            if exact or prefix:
+                for doc, mask in self.postings(end):
+                    score = self.field_score(mask) * (2 if exact else 1)
+                    scores[doc] = max(scores.get(doc, 0), score)
+            end += 1
+        return scores
+
+    def search(self, query, limit=20):
+        """Return up to limit (score, category, odf name) results for query, best first"""
+        tokens = TOKEN_PATTERN.findall(query.lower())
+        if not tokens:
+            return []
+        scores = None
+        for token in tokens:
+            matches = self.match(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {doc: score + matches[doc] for doc, score in scores.items() if doc in matches}
+            if not scores:
+                return []
+
+        if len(tokens) > 1:
+            for doc, score in self.match(query.lower().strip(), prefix=False).items():
+                if doc in scores:
+                    scores[doc] += score
+
+        docs = self.index["docs"]
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], len(docs[item[0]][1]), item[0]))
+        return [(score, self.index["categories"][docs[doc][0]], docs[doc][1]) for doc, score in ranked[:limit]]
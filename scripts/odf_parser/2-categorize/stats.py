@@ -0,0 +1,99 @@
+import json
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Value parsing shared with the other stages lives next to Parse-ODF-Data.py
+if str(Path(__file__).resolve().parent.parent) not in sys.path:
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from odf_values import to_number
+
+FORMAT = "odf-stats-1"
+QUANTILES = [0.1, 0.25, 0.5, 0.75, 0.9]
+BINS = 16
+# Properties with fewer numeric values than this are not worth comparing on
+MIN_COUNT = 3
+
+def property_matrix(objects):
+    """Read every numeric property of a category into an objects x properties array, NaN where absent
+
+    Properties are named "Section.key"; embedded ordnance and powerup
+    sections keep their prefix, e.g. "Ordnance.OrdnanceClass.shotSpeed".
+    """
+    columns = {}
+    rows = []
+    for odf_data in objects.values():
+        row = {}
+        for section, class_data in odf_data.items():
+            if not isinstance(class_data, dict):
+                continue
+            for key, value in class_data.items():
+                number = to_number(value)
+                if number is not None and math.isfinite(number):
+                    row[columns.setdefault(f"{section}.{key}", len(columns))] = number
+        rows.append(row)
+
+    matrix = np.full((len(rows), len(columns)), np.nan)
+    for i, row in enumerate(rows):
+        if row:
+            matrix[i, list(row)] = list(row.values())
+    counts = np.count_nonzero(~np.isnan(matrix), axis=0)
+    keep = counts >= MIN_COUNT
+    return [name for name, kept in zip(columns, keep) if kept], matrix[:, keep]
+
+def category_stats(objects):
+    """Summaries and sort orders for every numeric property of one category, all columns at once"""
+    names, matrix = property_matrix(objects)
+    if not names:
+        return {"objects": list(objects), "properties": {}}
+
+    present = ~np.isnan(matrix)
+    counts = present.sum(axis=0)
+    minimum = np.nanmin(matrix, axis=0)
+    maximum = np.nanmax(matrix, axis=0)
+    mean = np.nanmean(matrix, axis=0)
+    quantiles = np.nanquantile(matrix, QUANTILES, axis=0)
+
+    # Histogram every column in one bincount: offset each column's bins by column * BINS
+    span = np.where(maximum > minimum, maximum - minimum, 1.0)
+    filled = np.where(present, matrix, minimum)
+    bins = np.clip(((filled - minimum) / span * BINS).astype(np.int64, copy=False), 0, BINS - 1)
+    flat = (bins + np.arange(len(names)) * BINS)[present]
+    histograms = np.bincount(flat, minlength=len(names) * BINS).reshape(len(names), BINS)
+
+    # argsort puts NaN last, so each column's first counts[c] rows are its ranked objects
+    order = np.argsort(matrix, axis=0, kind="stable")
+
+    properties = {}
+    for c, name in enumerate(names):
+        properties[name] = {
+            "count": int(counts[c]),
+            "min": float(minimum[c]),
+            "max": float(maximum[c]),
+            "mean": round(float(mean[c]), 6),
+            "quantiles": [round(float(q), 6) for q in quantiles[:, c]],
+            "histogram": histograms[c].tolist(),
+            "order": order[:counts[c], c].tolist(),
+        }
+    return {"objects": list(objects), "properties": properties}
+
+def build_stats(categorized_data):
+    """Per-category numeric property statistics with presorted rank arrays
+
+    order lists object indices (into "objects") by ascending value, so the
+    n highest of a property are the last n entries, and an object's rank
+    is its position in the list.
+    """
+    return {
+        "format": FORMAT,
+        "quantiles": QUANTILES,
+        "bins": BINS,
+        "categories": {category: category_stats(objects) for category, objects in categorized_data.items()},
+    }
+
+def write_stats(categorized_data, output_path):
+    """Write the statistics sidecar as minified JSON"""
+    with open(output_path, 'w') as f:
+        json.dump(build_stats(categorized_data), f, separators=(',', ':'))
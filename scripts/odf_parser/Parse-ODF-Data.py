@@ -1,42 +1,350 @@
-import subprocess
-import shutil
+import argparse
+import hashlib
+import json
 import os
+import pickle
+import time
+from contextlib import nullcontext
+from pathlib import Path
 
-def run_script(script_path):
-    """Run a Python script."""
-    try:
-        subprocess.run(['python', script_path], check=True)
-        print(f"Successfully ran {script_path}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error running {script_path}: {e}")
+from instrumentation import Tracer
+from stage_loader import BASE_PATH, load_stage
+
+# Define the stage cache
+CACHE_DIR = BASE_PATH / '.cache'
+OUTPUT_RECORD = CACHE_DIR / 'outputs.json'
+
+# The runner wires the stages together and the shared modules shape their data, so they seed the first key
+SHARED_FILES = [Path(__file__).resolve()] + [BASE_PATH / name for name in
+                                             ('stage_loader.py', 'instrumentation.py', 'odf_values.py')]
+
+def hash_files(paths, seed=''):
+    """Hash file names and contents, in sorted order, on top of a seed"""
+    digest = hashlib.sha256(seed.encode())
+    for path in sorted(paths):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def stat_signature(sources):
+    """Hash the path, size and mtime of every file under the given sources
+    
+    Used instead of content hashes for raw ODF trees, which can be a full
+    game install plus mods.
+    """
+    digest = hashlib.sha256()
+    for source in map(Path, sources):
+        files = sorted(p for p in source.rglob('*') if p.is_file()) if source.is_dir() else [source]
+        for path in files:
+            stat = path.stat()
+            digest.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+    return digest.hexdigest()
+
+def hash_file(path):
+    """Hash a single file's contents"""
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+class StageCache:
+    """Pickled stage outputs keyed by a content hash of their inputs"""
+
+    def __init__(self, cache_dir, enabled=True):
+        self.cache_dir = cache_dir
+        self.enabled = enabled
+
+    def path(self, stage, key):
+        return self.cache_dir / f"{stage}-{key[:16]}.pickle"
+
+    def load(self, stage, key):
+        path = self.path(stage, key)
+        if not self.enabled or not path.exists():
+            return None
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def store(self, stage, key, value):
+        if not self.enabled:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Only keep the latest output per stage
+        for stale in self.cache_dir.glob(f"{stage}-*.pickle"):
+            stale.unlink()
+        with open(self.path(stage, key), 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+class Pipeline:
+    """Runs combine, merge and categorize in-process, reusing cached stage outputs"""
+
+    def __init__(self, cache, typed=False, keep_raw=False, normalized=False, odf_sources=None, workers=None):
+        self.cache = cache
+        self.combine = load_stage('0-combine', 'combine')
+        self.merge = load_stage('1-merge', 'merge')
+        self.categorize = load_stage('2-categorize', 'categorize')
+
+        # (name, folder, run, upstream stage whose output run receives)
+        self.stages = [
+            ('combine', '0-combine', self.run_combine, None),
+            ('merge', '1-merge', lambda data: self.merge.merge_odf_data(data, normalized=normalized), 'combine'),
+            ('categorize', '2-categorize', self.categorize.categorize_objects, 'merge'),
+        ]
+
+        # Each key covers the stage code, its options and the key of the stage
+        # before it, so a change anywhere upstream invalidates everything downstream
+        options = {
+            'combine': f"typed={typed},keep_raw={keep_raw}",
+            'merge': f"normalized={normalized}",
+        }
+        self.typed, self.keep_raw, self.normalized = typed, keep_raw, normalized
+        self.odf_sources, self.workers = odf_sources, workers
+        self.keys = {}
+        if odf_sources:
+            key = stat_signature(odf_sources)
+        else:
+            key = hash_files(self.combine.src_path.glob('*.json'))
+        key = hash_files(SHARED_FILES, seed=key)
+        for name, stage_dir, _, _ in self.stages:
+            key = hash_files((BASE_PATH / stage_dir).glob('*.py'), seed=name + options.get(name, '') + key)
+            self.keys[name] = key
+
+        self.outputs = {}
+        self.timings = {}
+        self.span = lambda name, count=None: nullcontext()
+
+    def add_layer(self, name, sources):
+        """Add a mod overlay stage that turns raw .odf sources into a delta on the merged base"""
+        def run(base_merged):
+            base_all = self.output('combine')
+            # The mod spells section and key names the way the base does, so they merge
+            overlay_all = self.combine.ingest_odf_sources(sources, typed=self.typed, keep_raw=self.keep_raw,
+                                                          workers=self.workers, preferred_names=base_all)
+            return self.merge.merge_layer(base_all, base_merged, overlay_all,
+                                          normalized=self.normalized)
+        stage = f"layer-{name}"
+        # Layers read the merged base rather than the stage before them
+        self.stages.append((stage, '1-merge', run, 'merge'))
+        self.keys[stage] = hash_files((BASE_PATH / '1-merge').glob('*.py'),
+                                      seed=stage + stat_signature(sources) + self.keys['merge'])
+        return stage
+
+    def trace_with(self, tracer):
+        """Record stage and sub-step spans in tracer"""
+        self.span = tracer.span
+        self.combine.span = self.merge.span = tracer.span
+
+    def run_combine(self, _):
+        """Combine stage: raw .odf sources when given, else the extracted JSON in 0-combine/src"""
+        if self.odf_sources:
+            return self.combine.ingest_odf_sources(self.odf_sources, typed=self.typed,
+                                                   keep_raw=self.keep_raw, workers=self.workers)
+        return self.combine.combine_files(self.combine.src_path, typed=self.typed, keep_raw=self.keep_raw)
+
+    def output(self, name):
+        """Return a stage's output from memory, the cache, or by running it"""
+        if name in self.outputs:
+            return self.outputs[name]
+
+        index = [stage[0] for stage in self.stages].index(name)
+        _, _, run, upstream_name = self.stages[index]
+        key = self.keys[name]
+
+        start = time.perf_counter()
+        with self.span(f"{name} cache load"):
+            data = self.cache.load(name, key)
+        if data is None:
+            upstream = self.output(upstream_name) if upstream_name else None
+            start = time.perf_counter()
+            with self.span(name, lambda: len(data)):
+                data = run(upstream)
+            self.timings[name] = ('ran', time.perf_counter() - start)
+            with self.span(f"{name} cache store"):
+                self.cache.store(name, key, data)
+        else:
+            self.timings[name] = ('cached', time.perf_counter() - start)
+
+        self.outputs[name] = data
+        return data
+
+def output_name(name, variant):
+    """Insert the output variant after the base name, e.g. odf.typed.norm.min.json"""
+    if not variant:
+        return name
+    base, dot, extension = name.partition('.')
+    return f"{base}.{variant}{dot}{extension}"
+
+def load_output_record():
+    if OUTPUT_RECORD.exists():
+        with open(OUTPUT_RECORD, 'r') as f:
+            return json.load(f)
+    return {}
+
+def save_output_record(record):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(OUTPUT_RECORD, 'w') as f:
+        json.dump(record, f, indent=4)
 
 def main():
-    # Define the base path for the scripts
-    base_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Build the categorized ODF data from the extracted ODF sources")
+    parser.add_argument('--write-intermediate', action='store_true',
+                        help="also write All-ODF-Data.json and Divine_ODF_Merge.json for each stage")
+    parser.add_argument('--typed', action='store_true',
+                        help="coerce numbers, colors and vectors to JSON types (writes *.typed.* files)")
+    parser.add_argument('--keep-raw', action='store_true',
+                        help="with --typed, keep the original text of coerced values under rawValues")
+    parser.add_argument('--normalized', action='store_true',
+                        help="link ordnance and powerups by key instead of embedding copies (writes *.norm.* files)")
+    parser.add_argument('--shards', action='store_true',
+                        help="also write per-category and per-object shards with a manifest to 2-categorize/shards")
+    parser.add_argument('--compact', action='store_true',
+                        help="also write the columnar, string-interned encoding (odf.compact.json)")
+    parser.add_argument('--odf', action='append', metavar='PATH',
+                        help="ingest raw .odf files from a directory tree or .zip archive instead of 0-combine/src "
+                             "(repeatable, later sources override earlier ones)")
+    parser.add_argument('--workers', type=int, help="worker processes for --odf and --mod (default: parse in-process)")
+    parser.add_argument('--techtree', action='store_true',
+                        help="also write the per-faction build prerequisite index (odf.techtree.min.json)")
+    parser.add_argument('--stats', action='store_true',
+                        help="also write per-category numeric property statistics and sort orders "
+                             "(odf.stats.min.json, needs numpy)")
+    parser.add_argument('--damage', action='store_true',
+                        help="also write weapon-vs-vehicle/building DPS and time-to-kill tables "
+                             "(odf.damage.min.json, needs numpy)")
+    parser.add_argument('--publish', type=Path, metavar='DIR',
+                        help="publish the default-format odf.min.json to DIR (e.g. ../../data/odf) as a new "
+                             "release, with a delta and patch notes from the release already there")
+    parser.add_argument('--mod', action='append', metavar='NAME=PATH', default=[],
+                        help="merge a mod's raw .odf folder or .zip over the base and write only its changes "
+                             "to 1-merge/mods/NAME.delta.json (repeatable)")
+    parser.add_argument('--trace', type=Path, metavar='DIR',
+                        help="record per-stage and sub-step time, CPU and peak memory to DIR/trace.json "
+                             "and DIR/trace.folded (flame graph input); combine with --no-cache for a full run")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="ignore and do not update the stage cache")
+    args = parser.parse_args()
+    # The site only renders the default format, with ordnance and powerups embedded
+    if args.publish and (args.typed or args.normalized):
+        parser.error("--publish only publishes the default format; run it without --typed and --normalized")
+
+    pipeline = Pipeline(StageCache(CACHE_DIR, enabled=not args.no_cache), typed=args.typed,
+                        keep_raw=args.typed and args.keep_raw, normalized=args.normalized,
+                        odf_sources=args.odf, workers=args.workers)
+    variant = '.'.join(name for name, enabled in (('typed', args.typed), ('norm', args.normalized)) if enabled)
+    combine, merge, categorize = pipeline.combine, pipeline.merge, pipeline.categorize
+
+    tracer = None
+    if args.trace:
+        tracer = Tracer()
+        tracer.start()
+        pipeline.trace_with(tracer)
+
+    # (stage, output path, writer) for every file this run should produce
+    outputs = []
+    if args.write_intermediate:
+        for path in (BASE_PATH / '0-combine' / 'All-ODF-Data.json',
+                     BASE_PATH / '1-merge' / 'src' / 'All-ODF-Data.json'):
+            outputs.append(('combine', path, combine.write_combined))
+        merged_name = output_name('Divine_ODF_Merge.json', variant)
+        for path in (BASE_PATH / '1-merge' / merged_name,
+                     BASE_PATH / '2-categorize' / 'src' / merged_name):
+            outputs.append(('merge', path, merge.write_merged))
+    outputs.append(('merge', BASE_PATH / '2-categorize' / output_name('odf.refs.min.json', variant),
+                    merge.write_references))
+    outputs.append(('categorize', BASE_PATH / '2-categorize' / output_name('Categorized-ODF-Data.json', variant),
+                    categorize.write_categorized))
+    outputs.append(('categorize', BASE_PATH / '2-categorize' / output_name('odf.min.json', variant),
+                    lambda data, path: categorize.write_categorized(data, path, minified=True)))
+    assets = load_stage('1-merge', 'assets')
+    outputs.append(('merge', BASE_PATH / '2-categorize' / output_name('odf.assets.min.json', variant),
+                    assets.write_assets))
+    # The prefix/token search index over names and class labels, for the lookup page to load next to odf.min.json
+    search = load_stage('2-categorize', 'search')
+    outputs.append(('categorize', BASE_PATH / '2-categorize' / output_name('odf.search.min.json', variant),
+                    search.write_index))
+
+    if args.shards:
+        # Shards are written as a set; the manifest stands in for the whole directory
+        shards_dir = BASE_PATH / '2-categorize' / output_name('shards', variant)
+        outputs.append(('categorize', shards_dir / 'manifest.json',
+                        lambda data, path: categorize.print_shard_summary(categorize.write_shards(data, path.parent))))
+
+    if args.techtree:
+        outputs.append(('merge', BASE_PATH / '2-categorize' / output_name('odf.techtree.min.json', variant),
+                        merge.write_tech_trees))
+
+    if args.stats:
+        try:
+            stats = load_stage('2-categorize', 'stats')
+        except ImportError:
+            parser.error("--stats needs numpy (pip install numpy)")
+        outputs.append(('categorize', BASE_PATH / '2-categorize' / output_name('odf.stats.min.json', variant),
+                        stats.write_stats))
+
+    if args.damage:
+        try:
+            damage = load_stage('2-categorize', 'damage')
+        except ImportError:
+            parser.error("--damage needs numpy (pip install numpy)")
+
+        def write_damage(data, path):
+            matrix = damage.DamageMatrix(data)
+            damage.write_tables(matrix, path)
+            damage.print_damage_summary(matrix)
+        outputs.append(('categorize', BASE_PATH / '2-categorize' / output_name('odf.damage.min.json', variant),
+                        write_damage))
+
+    if args.publish:
+        releases = load_stage('2-categorize', 'releases')
+        outputs.append(('categorize', args.publish.resolve() / 'versions.json',
+                        lambda data, path: releases.print_release_summary(releases.publish_release(data, path.parent))))
+
+    if args.mod:
+        layers = load_stage('1-merge', 'layers')
+    for mod in args.mod:
+        name, _, path = mod.partition('=')
+        if not name or not path:
+            parser.error(f"--mod expects NAME=PATH, got {mod!r}")
+        stage = pipeline.add_layer(name, [path])
+        outputs.append((stage, BASE_PATH / '1-merge' / 'mods' / output_name(f"{name}.delta.json", variant),
+                        layers.write_delta))
+
+    if args.compact:
+        compact = load_stage('2-categorize', 'compact')
+        outputs.append(('categorize', BASE_PATH / '2-categorize' / output_name('odf.compact.json', variant),
+                        compact.write_compact))
+
+    record = {} if args.no_cache else load_output_record()
+    for stage, path, write in outputs:
+        relative = Path(os.path.relpath(path, BASE_PATH)).as_posix()
+        previous = record.get(relative, {})
+        # Skip files already written from the same inputs and left untouched since
+        if (previous.get('key') == pipeline.keys[stage] and path.exists()
+                and previous.get('sha256') == hash_file(path)):
+            print(f"Up to date: {relative}")
+            continue
 
-    # Step 1: Run combine.py
-    combine_script = os.path.join(base_path, '0-combine', 'combine.py')
-    run_script(combine_script)
+        data = pipeline.output(stage)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with pipeline.span(f"write {relative}"):
+            write(data, path)
+        record[relative] = {'key': pipeline.keys[stage], 'sha256': hash_file(path)}
+        print(f"Wrote {relative}")
 
-    # Step 2: Copy All-ODF-Data.json to 1-merge src folder
-    all_odf_data_path = os.path.join(base_path, '0-combine', 'All-ODF-Data.json')
-    merge_src_path = os.path.join(base_path, '1-merge', 'src', 'All-ODF-Data.json')
-    shutil.copy(all_odf_data_path, merge_src_path)
-    print(f"Copied {all_odf_data_path} to {merge_src_path}")
+    if not args.no_cache:
+        save_output_record(record)
 
-    # Step 3: Run merge.py
-    merge_script = os.path.join(base_path, '1-merge', 'merge.py')
-    run_script(merge_script)
+    if 'categorize' in pipeline.outputs:
+        categorize.print_summary(pipeline.outputs['categorize'])
 
-    # Step 4: Copy Divine_ODF_Merge.json to 2-categorize src folder
-    divine_odf_merge_path = os.path.join(base_path, '1-merge', 'Divine_ODF_Merge.json')
-    categorize_src_path = os.path.join(base_path, '2-categorize', 'src', 'Divine_ODF_Merge.json')
-    shutil.copy(divine_odf_merge_path, categorize_src_path)
-    print(f"Copied {divine_odf_merge_path} to {categorize_src_path}")
+    print("\nStage timings:")
+    for name, _, _, _ in pipeline.stages:
+        status, elapsed = pipeline.timings.get(name, ('skipped', 0.0))
+        print(f"{name:<12} {status:<8} {elapsed:.3f}s")
 
-    # Step 5: Run categorize.py
-    categorize_script = os.path.join(base_path, '2-categorize', 'categorize.py')
-    run_script(categorize_script)
+    if tracer:
+        tracer.stop()
+        args.trace.mkdir(parents=True, exist_ok=True)
+        tracer.write_json(args.trace / 'trace.json')
+        tracer.write_folded(args.trace / 'trace.folded')
+        tracer.print_summary()
+        print(f"\nTrace written to: {args.trace}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,52 @@
+import gzip
+import json
+import sys
+import time
+from pathlib import Path
+
+from stages import ROOT_DIR, load_stage
+
+compact = load_stage('2-categorize', 'compact')
+
+def best_of(func, repeat=5):
+    """Return the fastest of several runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    input_path = Path(sys.argv[1]) if len(sys.argv) > 1 else ROOT_DIR / '2-categorize' / 'odf.min.json'
+    with open(input_path, 'r') as f:
+        current_text = f.read()
+    categorized_data = json.loads(current_text)
+
+    compact_text = json.dumps(compact.encode(categorized_data), separators=(',', ':'))
+
+    # Round trip: decoding must give back exactly the current minified JSON
+    decoded_text = json.dumps(compact.decode(json.loads(compact_text)), separators=(',', ':'))
+    print(f"Input: {input_path.name}")
+    if decoded_text != current_text:
+        mismatch = next((i for i, (a, b) in enumerate(zip(decoded_text, current_text)) if a != b),
+                        min(len(decoded_text), len(current_text)))
+        print(f"Round trip differs at character {mismatch}:")
+        print(f"  expected: {current_text[max(0, mismatch - 40):mismatch + 40]}")
+        print(f"  decoded:  {decoded_text[max(0, mismatch - 40):mismatch + 40]}")
+        sys.exit(1)
+    print("Round trip identical: True\n")
+
+    rows = [
+        ('current', current_text, lambda: json.loads(current_text)),
+        ('columnar', compact_text, lambda: compact.decode(json.loads(compact_text))),
+    ]
+    print(f"{'format':<10} {'bytes':>10} {'gzip':>10} {'decode ms':>10}")
+    print("-" * 43)
+    for name, text, load in rows:
+        data = text.encode()
+        print(f"{name:<10} {len(data):>10} {len(gzip.compress(data)):>10} {best_of(load) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from stages import load_stage
+
+combine = load_stage('0-combine', 'combine')
+
+def write_raw_tree(all_data, target_dir, copies):
+    """Write the combined JSON sources back out as raw .odf files, copies times over"""
+    for copy in range(copies):
+        folder = target_dir / f"pack{copy:02d}"
+        folder.mkdir(parents=True)
+        for odf_name, odf_data in all_data.items():
+            lines = []
+            for section, class_data in odf_data.items():
+                lines.append(f"[{section}]")
+                lines.extend(f"{key} = {value}" for key, value in class_data.items())
+                lines.append("")
+            name = odf_name if copy == 0 else f"c{copy:02d}_{odf_name}"
+            (folder / name).write_text("\n".join(lines), encoding='latin-1')
+
+def main():
+    parser = argparse.ArgumentParser(description="Time raw .odf ingest, serial vs process pool")
+    parser.add_argument('--copies', type=int, default=10, help="how many copies of the source corpus to write")
+    parser.add_argument('--workers', type=int, default=max(2, os.cpu_count() or 1),
+                        help="processes for the pool run (default: one per core, at least 2)")
+    args = parser.parse_args()
+
+    source = combine.combine_files(combine.src_path)
+    with tempfile.TemporaryDirectory() as temp:
+        tree = Path(temp)
+        write_raw_tree(source, tree, args.copies)
+
+        # Every value survives the trip through raw .odf text, apart from
+        # trailing comments the extractor left in the JSON and section and
+        # key names the sources spell differently from file to file
+        parsed = combine.ingest_odf_sources([tree / 'pack00'], workers=1)
+        mismatched = sum(1 for name in source if parsed.get(name) != source[name])
+        print(f"\nObjects differing from the JSON sources: {mismatched} of {len(source)}\n")
+
+        file_count = len(source) * args.copies
+        print(f"{'mode':<10} {'files':>8} {'seconds':>8}")
+        print("-" * 28)
+        for mode, workers in (('serial', 1), ('pool', args.workers)):
+            start = time.perf_counter()
+            combine.ingest_odf_sources([tree], workers=workers)
+            print(f"{mode:<10} {file_count:>8} {time.perf_counter() - start:>8.2f}")
+
+if __name__ == "__main__":
+    main()
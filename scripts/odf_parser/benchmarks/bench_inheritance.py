@@ -0,0 +1,47 @@
+import random
+import time
+
+from stages import load_stage
+
+merge = load_stage('1-merge', 'merge')
+
+def make_corpus(count, max_depth=4, seed=0):
+    """Build a synthetic corpus where most objects inherit from an earlier object"""
+    rng = random.Random(seed)
+    all_data = {}
+    depths = {}
+    names = []
+    for i in range(count):
+        name = f"obj{i:06d}"
+        parent = None
+        if names and rng.random() < 0.7:
+            candidate = rng.choice(names)
+            if depths[candidate] < max_depth:
+                parent = candidate
+
+        depths[name] = depths[parent] + 1 if parent else 0
+        class_label = parent if parent else rng.choice(['wingman', 'hover', 'cannon', 'armory'])
+        all_data[f"{name}.odf"] = {
+            "GameObjectClass": {
+                "classLabel": class_label,
+                "unitName": f"Unit {i}",
+                "maxHealth": str(rng.randint(500, 5000)),
+                "scrapCost": str(rng.randint(10, 100)),
+            },
+            "CraftClass": {f"key{k}": str(rng.random()) for k in range(rng.randint(4, 20))},
+        }
+        names.append(name)
+    return all_data
+
+def main():
+    print(f"{'objects':>10} {'seconds':>10} {'us/object':>10}")
+    print("-" * 32)
+    for count in (1000, 10000, 100000):
+        all_data = make_corpus(count)
+        start = time.perf_counter()
+        merge.resolve_inheritance(all_data)
+        elapsed = time.perf_counter() - start
+        print(f"{count:>10} {elapsed:>10.3f} {elapsed / count * 1e6:>10.1f}")
+
+if __name__ == "__main__":
+    main()
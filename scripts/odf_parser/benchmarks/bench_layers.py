@@ -0,0 +1,71 @@
+import argparse
+import json
+import random
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from io import StringIO
+
+from corpus import load_templates, mutate_value
+from stages import load_stage
+
+merge = load_stage('1-merge', 'merge')
+layers = load_stage('1-merge', 'layers')
+
+def make_overlay(all_data, fraction, rng):
+    """Override a random fraction of ODFs with one mutated section each, like a balance mod"""
+    overlay = {}
+    for odf_name in rng.sample(sorted(all_data), max(1, int(len(all_data) * fraction))):
+        odf_data = {section: dict(class_data) for section, class_data in all_data[odf_name].items()}
+        section = rng.choice(list(odf_data))
+        odf_data[section] = {key: mutate_value(value, rng) for key, value in odf_data[section].items()}
+        overlay[odf_name] = odf_data
+    return overlay
+
+def dumped_size(data):
+    return len(json.dumps(data, separators=(',', ':')))
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare mod overlays stored as deltas against full merged copies")
+    parser.add_argument('--mods', type=int, default=5, help="how many mod overlays to build")
+    parser.add_argument('--fraction', type=float, default=0.02, help="share of ODFs each mod overrides")
+    parser.add_argument('--normalized', action='store_true')
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    all_data = load_templates()
+    with redirect_stdout(StringIO()):
+        base_merged = merge.merge_odf_data(all_data, args.normalized)
+    overlays = [make_overlay(all_data, args.fraction, rng) for _ in range(args.mods)]
+    print(f"Base: {len(base_merged)} objects, {dumped_size(base_merged) / 1e6:.2f} MB\n")
+
+    results = {}
+    for mode in ('full', 'delta'):
+        tracemalloc.start()
+        start = time.perf_counter()
+        kept, size = [], 0
+        with redirect_stdout(StringIO()):
+            for overlay in overlays:
+                if mode == 'full':
+                    merged = merge.merge_odf_data({**all_data, **overlay}, args.normalized)
+                    kept.append(merged)
+                    size += dumped_size(merged)
+                else:
+                    delta = merge.merge_layer(all_data, base_merged, overlay, args.normalized)
+                    kept.append(layers.LayeredData(base_merged, delta))
+                    size += dumped_size(delta)
+        elapsed = time.perf_counter() - start
+        retained = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        results[mode] = kept
+        print(f"{mode:<6} {args.mods} mods: {elapsed:6.2f}s, output {size / 1e6:6.2f} MB, retained {retained / 1e6:6.1f} MB")
+
+    mismatched = 0
+    # Every layer must resolve to exactly what a full merge of the mod produces
+    for full, layered in zip(results['full'], results['delta']):
+        if json.dumps(full, indent=4) != json.dumps(dict(layered.items()), indent=4):
+            mismatched += 1
+    print(f"\nLayers differing from a full merge: {mismatched} of {args.mods}")
+
+if __name__ == "__main__":
+    main()
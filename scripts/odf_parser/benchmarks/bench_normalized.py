@@ -0,0 +1,49 @@
+import gzip
+import json
+import time
+
+from stages import ROOT_DIR, load_stage
+
+merge = load_stage('1-merge', 'merge')
+categorize = load_stage('2-categorize', 'categorize')
+resolve = load_stage('2-categorize', 'resolve')
+
+def best_of(func, repeat=5):
+    """Return the fastest of several runs, in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def main():
+    with open(ROOT_DIR / '1-merge' / 'src' / 'All-ODF-Data.json', 'r') as f:
+        source = f.read()
+
+    embedded = categorize.categorize_objects(merge.merge_odf_data(json.loads(source)))
+    normalized = categorize.categorize_objects(merge.merge_odf_data(json.loads(source), normalized=True))
+
+    embedded_text = json.dumps(embedded, separators=(',', ':'))
+    normalized_text = json.dumps(normalized, separators=(',', ':'))
+
+    # The resolver must reproduce the embedded format exactly
+    expanded_text = json.dumps(resolve.expand(normalized), separators=(',', ':'))
+    print(f"Resolver round trip identical: {expanded_text == embedded_text}\n")
+
+    rows = [
+        ('embedded', embedded_text, None),
+        ('normalized', normalized_text, lambda: resolve.expand(json.loads(normalized_text))),
+    ]
+    print(f"{'format':<12} {'bytes':>10} {'gzip':>10} {'parse ms':>10} {'expand ms':>10}")
+    print("-" * 56)
+    for name, text, expand in rows:
+        size = len(text.encode())
+        gzipped = len(gzip.compress(text.encode()))
+        parse = best_of(lambda: json.loads(text)) * 1000
+        expand_ms = f"{best_of(expand) * 1000:.1f}" if expand else '-'
+        print(f"{name:<12} {size:>10} {gzipped:>10} {parse:>10.1f} {expand_ms:>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import random
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+import corpus
+from stages import load_stage
+
+merge = load_stage('1-merge', 'merge')
+categorize = load_stage('2-categorize', 'categorize')
+search = load_stage('2-categorize', 'search')
+
+def fuzzy_match(needle, haystack):
+    """Port of fuzzySearch in js/odf.js: needle's characters appear in order in haystack"""
+    position = 0
+    for char in needle:
+        position = haystack.find(char, position) + 1
+        if not position:
+            return False
+    return True
+
+def scan(categorized_data, term):
+    """What js/odf.js does per keystroke: test every object's names against the term"""
+    matches = []
+    for category, objects in categorized_data.items():
+        for odf_name, odf_data in objects.items():
+            names = [odf_name, odf_name.replace('.odf', ''),
+                     (odf_data.get('GameObjectClass', {}).get('unitName') or '').lower(),
+                     (odf_data.get('WeaponClass', {}).get('wpnName') or '').lower()]
+            if any(name and (name == term or fuzzy_match(term, name)) for name in names):
+                matches.append((category, odf_name))
+    return matches
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the inverted search index with a full scan")
+    parser.add_argument('sizes', nargs='*', type=int, default=[1000, 10000])
+    parser.add_argument('--queries', type=int, default=50)
+    args = parser.parse_args()
+
+    templates = corpus.load_templates()
+    rng = random.Random(0)
+    print(f"{'objects':>8} {'build s':>8} {'index KB':>9} {'scan ms':>8} {'index ms':>9}")
+    print("-" * 46)
+    for size in args.sizes:
+        data = corpus.generate_corpus(size, seed=0, templates=templates)
+        with redirect_stdout(StringIO()):
+            categorized = categorize.categorize_objects(merge.merge_odf_data(data))
+
+        start = time.perf_counter()
+        built = search.build_index(categorized)
+        build_time = time.perf_counter() - start
+        index = search.SearchIndex(built)
+
+        # Queries are prefixes of real names, like a user part way through typing
+        names = [name for objects in categorized.values() for name in objects]
+        queries = [name.split('_', 1)[1][:rng.randint(3, 8)] for name in rng.sample(names, args.queries)]
+        start = time.perf_counter()
+        for query in queries:
+            scan(categorized, query)
+        scan_time = (time.perf_counter() - start) / len(queries)
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query)
+        index_time = (time.perf_counter() - start) / len(queries)
+
+        size_kb = len(json.dumps(built, separators=(',', ':'))) / 1024
+        print(f"{size:>8} {build_time:>8.2f} {size_kb:>9.0f} {scan_time * 1e3:>8.2f} {index_time * 1e3:>9.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import argparse
+import json
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from stages import load_stage
+
+combine = load_stage('0-combine', 'combine')
+
+def write_synthetic_sources(src_dir, copies):
+    """Clone every source file copies times over, renaming the ODFs in each copy"""
+    for json_file in combine.src_path.glob('*.json'):
+        with open(json_file, 'r') as f:
+            file_data = json.load(f)
+        cloned = {}
+        for copy in range(copies):
+            for name, odf_data in file_data.items():
+                cloned[name if copy == 0 else f"c{copy:03d}_{name}"] = odf_data
+        with open(src_dir / json_file.name, 'w') as f:
+            json.dump(cloned, f, indent=4)
+
+def measure(func):
+    """Return (seconds, peak traced bytes) for one call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare peak memory of in-memory and streaming combine")
+    parser.add_argument('--copies', type=int, default=20, help="how many copies of the source corpus to combine")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp:
+        src_dir = Path(temp) / 'src'
+        src_dir.mkdir()
+        write_synthetic_sources(src_dir, args.copies)
+        source_bytes = sum(p.stat().st_size for p in src_dir.glob('*.json'))
+
+        in_memory_path = Path(temp) / 'in-memory.json'
+        streamed_path = Path(temp) / 'streamed.json'
+        runs = [
+            ('in-memory', lambda: combine.write_combined(combine.combine_files(src_dir), in_memory_path)),
+            ('streaming', lambda: combine.stream_combine(src_dir, streamed_path)),
+        ]
+        results = [(name, *measure(run)) for name, run in runs]
+
+        print(f"\nSource: {source_bytes / 1e6:.1f} MB in {len(list(src_dir.glob('*.json')))} files")
+        print(f"Outputs identical: {in_memory_path.read_bytes() == streamed_path.read_bytes()}\n")
+        print(f"{'mode':<10} {'seconds':>8} {'peak MB':>8}")
+        print("-" * 28)
+        for name, elapsed, peak in results:
+            print(f"{name:<10} {elapsed:>8.2f} {peak / 1e6:>8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+import json
+import sys
+import time
+
+from stages import ROOT_DIR, load_stage
+
+references = load_stage('1-merge', 'references')
+techtree = load_stage('1-merge', 'techtree')
+
+def walk_prerequisites(graph, name, seen=None):
+    """Naive answer to "what must exist before name": walk every require edge each time"""
+    seen = set() if seen is None else seen
+    for target in graph.targets(name, 'require'):
+        if target not in seen:
+            seen.add(target)
+            walk_prerequisites(graph, target, seen)
+    return seen
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = function()
+    return result, (time.perf_counter() - start) / repeat
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else ROOT_DIR / '1-merge' / 'Divine_ODF_Merge.json'
+    with open(path, 'r') as f:
+        merged_data = json.load(f)
+
+    graph, graph_time = timed(lambda: references.ReferenceGraph(merged_data), 5)
+    trees, build_time = timed(lambda: techtree.build_tech_trees(graph), 20)
+    print(f"Reference graph: {graph_time * 1e3:.1f} ms, closure for all factions: {build_time * 1e3:.1f} ms\n")
+
+    print(f"{'faction':<8} {'objects':>8} {'tokens':>7} {'walk us':>9} {'index us':>9}")
+    print("-" * 45)
+    for faction, tree in trees.items():
+        _, walk_time = timed(lambda: [walk_prerequisites(graph, name) for name in tree.objects], 5)
+        _, index_time = timed(lambda: [tree.prerequisites(name) for name in tree.objects], 5)
+        count = len(tree.objects)
+        print(f"{faction:<8} {count:>8} {len(tree.tokens):>7} {walk_time / count * 1e6:>9.1f} "
+              f"{index_time / count * 1e6:>9.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import json
+import random
+import re
+from contextlib import redirect_stdout
+from io import StringIO
+
+from stages import load_stage
+
+combine = load_stage('0-combine', 'combine')
+
+# Keys holding references to other ODFs, and the category of object they point at
+REFERENCE_KEYS = [
+    (re.compile(r"ordName"), "OrdnanceClass"),
+    (re.compile(r"weaponName\d*"), "WeaponClass"),
+    (re.compile(r"buildItem\d+"), None),
+    (re.compile(r"requireName\d+"), None),
+    (re.compile(r"spawnName"), None),
+]
+
+def load_templates():
+    """Load the real combined ODF objects to clone shapes from"""
+    with redirect_stdout(StringIO()):
+        return combine.combine_files(combine.src_path)
+
+def mutate_value(value, rng):
+    """Nudge numbers so clones are not byte-identical to their template"""
+    number = combine.parse_number(value) if isinstance(value, str) else None
+    if number is None or number == 0:
+        return value
+    if isinstance(number, int):
+        return str(max(1, int(number * rng.uniform(0.8, 1.2))))
+    return f"{number * rng.uniform(0.8, 1.2):.3f}"
+
+def generate_corpus(count, max_depth=3, inherit_rate=0.3, reference_density=0.8, seed=0, templates=None):
+    """Generate count synthetic ODF objects in combine-stage form
+
+    Every object clones a random real ODF and mutates its numbers. With
+    probability inherit_rate its classLabel is pointed at an earlier
+    synthetic object of the same kind, keeping chains at most max_depth
+    deep. Each ODF reference (ordName, weaponName, buildItem, requireName,
+    spawnName) is retargeted at a synthetic object with probability
+    reference_density and otherwise left dangling.
+    """
+    rng = random.Random(seed)
+    templates = templates or load_templates()
+    template_items = list(templates.items())
+
+    corpus = {}
+    names = []
+    depths = {}
+    by_kind = {}
+    for i in range(count):
+        template_name, template = rng.choice(template_items)
+        name = f"syn{i:06d}_{template_name}"
+        odf_data = {section: {key: mutate_value(value, rng) for key, value in class_data.items()}
+                    for section, class_data in template.items()}
+
+        kind = next((section for section in ("OrdnanceClass", "WeaponClass", "CraftClass", "BuildingClass")
+                     if section in odf_data), "Other")
+        depth = 0
+        parents = [p for p in by_kind.get(kind, [])[-50:] if depths[p] < max_depth]
+        if parents and rng.random() < inherit_rate:
+            parent = rng.choice(parents)
+            depth = depths[parent] + 1
+            for class_data in odf_data.values():
+                if "classLabel" in class_data:
+                    class_data["classLabel"] = parent[:-len(".odf")]
+                    break
+
+        for class_data in odf_data.values():
+            for key in class_data:
+                for pattern, target_kind in REFERENCE_KEYS:
+                    if not pattern.fullmatch(key):
+                        continue
+                    pool = by_kind.get(target_kind) if target_kind else names
+                    if pool and rng.random() < reference_density:
+                        class_data[key] = rng.choice(pool)[:-len(".odf")]
+                    break
+
+        corpus[name] = odf_data
+        names.append(name)
+        depths[name] = depth
+        by_kind.setdefault(kind, []).append(name)
+    return corpus
+
+def write_sources(corpus, src_dir, files=5):
+    """Split a corpus over several *-ODF-Data.json files, like 0-combine/src"""
+    names = list(corpus)
+    size = -(-len(names) // files)
+    for index in range(files):
+        chunk = {name: corpus[name] for name in names[index * size:(index + 1) * size]}
+        with open(src_dir / f"Synthetic{index}-ODF-Data.json", 'w') as f:
+            json.dump(chunk, f, indent=4)
@@ -0,0 +1,141 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timezone
+from io import StringIO
+from pathlib import Path
+
+import corpus
+from stages import ROOT_DIR, load_stage
+
+combine = load_stage('0-combine', 'combine')
+merge = load_stage('1-merge', 'merge')
+categorize = load_stage('2-categorize', 'categorize')
+
+RESULTS_DIR = Path(__file__).resolve().parent / 'results'
+METRICS = ('wall', 'cpu', 'peak_bytes')
+
+def measure(func, trace_memory):
+    """Run func once with stage output silenced; return (result, wall, cpu, peak bytes)"""
+    if trace_memory:
+        tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    with redirect_stdout(StringIO()):
+        result = func()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result, wall, cpu, peak
+
+def run_size(size, args, templates):
+    """Generate one corpus and time each stage on it"""
+    data = corpus.generate_corpus(size, max_depth=args.depth, inherit_rate=args.inherit,
+                                  reference_density=args.references, seed=args.seed, templates=templates)
+    results = []
+    with tempfile.TemporaryDirectory() as temp:
+        src_dir = Path(temp)
+        corpus.write_sources(data, src_dir)
+        del data
+
+        stages = [
+            ('combine', lambda _: combine.combine_files(src_dir)),
+            ('merge', merge.merge_odf_data),
+            ('categorize', categorize.categorize_objects),
+            ('serialize', lambda categorized: categorize.write_categorized(categorized, src_dir / 'odf.min.json',
+                                                                           minified=True)),
+        ]
+        upstream = None
+        for name, run in stages:
+            # Memory is traced in a second run since tracemalloc skews timings; stages leave their input unchanged
+            output, wall, cpu, _ = measure(lambda: run(upstream), trace_memory=False)
+            peak = None
+            if not args.no_memory:
+                _, _, _, peak = measure(lambda: run(upstream), trace_memory=True)
+            objects = len(output) if isinstance(output, dict) else None
+            if name == 'categorize':
+                objects = sum(len(category) for category in output.values())
+            results.append({'size': size, 'stage': name, 'wall': wall, 'cpu': cpu,
+                            'peak_bytes': peak, 'objects': objects})
+            print(f"{size:>8} {name:<11} {wall:>8.3f} {cpu:>8.3f} "
+                  f"{(peak or 0) / 1e6:>9.1f} {objects if objects is not None else '-':>8}")
+            if output is not None:
+                upstream = output
+    return results
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare(results, baseline_path, threshold):
+    """Print metrics that got worse than the baseline by more than threshold; return their count"""
+    with open(baseline_path, 'r') as f:
+        baseline = {(r['size'], r['stage']): r for r in json.load(f)['results']}
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (threshold {threshold:.0%}):")
+    for result in results:
+        previous = baseline.get((result['size'], result['stage']))
+        if not previous:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = new / old - 1
+            if change > threshold:
+                regressions += 1
+                print(f"  REGRESSION {result['size']} {result['stage']} {metric}: {old:.4g} -> {new:.4g} (+{change:.0%})")
+    if not regressions:
+        print("  No regressions")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Time and memory-profile the ODF pipeline on synthetic corpora")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--depth', type=int, default=3, help="maximum synthetic inheritance depth")
+    parser.add_argument('--inherit', type=float, default=0.3, help="share of objects that inherit from another")
+    parser.add_argument('--references', type=float, default=0.8, help="share of ODF references that resolve")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    parser.add_argument('--output', type=Path, help="results file (default: results/<commit>.json)")
+    parser.add_argument('--baseline', type=Path, help="earlier results file to check for regressions")
+    parser.add_argument('--threshold', type=float, default=0.2, help="allowed slowdown before flagging")
+    args = parser.parse_args()
+
+    templates = corpus.load_templates()
+    print(f"{'size':>8} {'stage':<11} {'wall s':>8} {'cpu s':>8} {'peak MB':>9} {'objects':>8}")
+    print("-" * 57)
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(size, args, templates))
+
+    commit = git_commit()
+    output = args.output or RESULTS_DIR / f"{commit or 'results'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parameters': {'depth': args.depth, 'inherit': args.inherit,
+                           'references': args.references, 'seed': args.seed},
+            'results': results,
+        }, f, indent=4)
+    print(f"\nResults written to: {output}")
+
+    if args.baseline and compare(results, args.baseline, args.threshold):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
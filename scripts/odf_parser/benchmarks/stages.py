@@ -0,0 +1,12 @@
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# The stage loader lives with Parse-ODF-Data.py, one folder up
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from stage_loader import load_stage
+
+__all__ = ['ROOT_DIR', 'load_stage']
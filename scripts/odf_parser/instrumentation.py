@@ -0,0 +1,84 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+class Tracer:
+    """Records nested spans with wall time, CPU time, peak memory and object counts
+
+    Stage modules call a module-level span(name, count=None) hook that is a
+    no-op by default; the pipeline runner points those hooks at
+    Tracer.span when tracing is switched on. count is a zero-argument
+    callable evaluated when the span closes, so it costs nothing when off.
+    """
+
+    def __init__(self, memory=True):
+        self.memory = memory
+        self.spans = []
+        self.stack = []
+        self.origin = time.perf_counter()
+
+    def start(self):
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self):
+        if self.memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def span(self, name, count=None):
+        record = {'name': name, 'path': ';'.join([frame['name'] for frame in self.stack] + [name])}
+        frame = {'name': name, 'peak': 0, 'start_bytes': 0}
+        if self.memory:
+            current, outer_peak = tracemalloc.get_traced_memory()
+            if self.stack:
+                self.stack[-1]['peak'] = max(self.stack[-1]['peak'], outer_peak)
+            # reset_peak lets this span see its own high-water mark; the
+            # enclosing span keeps the larger of both in its frame
+            tracemalloc.reset_peak()
+            frame['start_bytes'] = current
+        self.stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        record['start'] = wall - self.origin
+        try:
+            yield record
+        finally:
+            record['wall'] = time.perf_counter() - wall
+            record['cpu'] = time.process_time() - cpu
+            self.stack.pop()
+            if self.memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(peak, frame['peak'])
+                record['peak_bytes'] = peak - frame['start_bytes']
+                record['end_bytes'] = current - frame['start_bytes']
+                if self.stack:
+                    self.stack[-1]['peak'] = max(self.stack[-1]['peak'], peak)
+            if count is not None:
+                record['objects'] = count()
+            self.spans.append(record)
+
+    def write_json(self, output_path):
+        """Write every span, in start order, as a JSON trace"""
+        with open(output_path, 'w') as f:
+            json.dump({'memory': self.memory, 'spans': sorted(self.spans, key=lambda r: r['start'])}, f, indent=4)
+
+    def write_folded(self, output_path):
+        """Write self wall time per stack in microseconds, the collapsed format flamegraph tools read"""
+        child_time = {}
+        for record in self.spans:
+            parent = record['path'].rpartition(';')[0]
+            if parent:
+                child_time[parent] = child_time.get(parent, 0.0) + record['wall']
+        with open(output_path, 'w') as f:
+            for record in self.spans:
+                self_time = max(record['wall'] - child_time.get(record['path'], 0.0), 0.0)
+                f.write(f"{record['path']} {int(self_time * 1e6)}\n")
+
+    def print_summary(self):
+        print("\nTrace:")
+        for record in sorted(self.spans, key=lambda r: r['start']):
+            peak = f"{record['peak_bytes'] / 1e6:8.1f} MB" if 'peak_bytes' in record else ''
+            objects = f"{record['objects']:>8} objects" if 'objects' in record else ''
+            indent = '  ' * record['path'].count(';')
+            print(f"{indent + record['name']:<40} {record['wall']:8.3f}s {record['cpu']:8.3f}s cpu {peak} {objects}")
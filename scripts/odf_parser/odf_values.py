@@ -0,0 +1,41 @@
+import re
+
+# Numbers as the game writes them: optional sign, optional f suffix on floats
+INT_PATTERN = re.compile(r'-?(0|[1-9]\d*)')
+FLOAT_PATTERN = re.compile(r'-?(\d+\.\d*|\.\d+|\d+)([eE][-+]?\d+)?[fF]?')
+
+def parse_number(text):
+    """Return text as an int or float, or None if it is not a plain number"""
+    if INT_PATTERN.fullmatch(text):
+        return int(text)
+    if FLOAT_PATTERN.fullmatch(text) and not re.fullmatch(r'-?0\d+', text):
+        return float(text.rstrip('fF'))
+    return None
+
+def strip_comment(text):
+    """Cut a trailing // comment, unless the // sits inside a balanced pair of quotes
+
+    "textures/a//b.tga" keeps its //; an unclosed quote does not protect
+    what follows it, so "abc // note still loses the comment.
+    """
+    position = text.find('//')
+    while position != -1:
+        quotes = text.count('"', 0, position)
+        # An odd count means an open quote; it only counts if it closes after the //
+        if quotes % 2 == 0 or '"' not in text[position + 2:]:
+            return text[:position]
+        position = text.find('//', text.index('"', position + 2) + 1)
+    return text
+
+def to_number(value):
+    """Read an ODF value as a float, whether or not the data was --typed
+
+    Strings go through parse_number, so game-style floats such as "0.5f"
+    count; trailing // comments and surrounding quotes are ignored.
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        number = parse_number(strip_comment(value).strip().strip('"').strip())
+        return None if number is None else float(number)
+    return None
@@ -0,0 +1,19 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+# The folder holding the numbered stage folders
+BASE_PATH = Path(__file__).resolve().parent
+
+def load_stage(stage_dir, module_name):
+    """Import a pipeline stage script as a module"""
+    stage_path = BASE_PATH / stage_dir
+    # Stages may import sibling helper modules from their own folder
+    if str(stage_path) not in sys.path:
+        sys.path.insert(0, str(stage_path))
+    spec = importlib.util.spec_from_file_location(module_name, stage_path / f"{module_name}.py")
+    module = importlib.util.module_from_spec(spec)
+    # Registered so worker processes can unpickle functions from the stage
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module